@@ -0,0 +1,92 @@
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.models import CustomUser
+from .caches import verified_token_cache
+from .metrics import record_cache
+
+USER_CACHE_PREFIX = 'jwt-user'
+REVOKED_TOKEN_PREFIX = 'jwt-revoked'
+# Поля, нужные для проверки прав; остальные загружаются при обращении.
+# Model.from_db ожидает значения в порядке полей модели.
+USER_SNAPSHOT_FIELDS = tuple(
+    field.attname for field in CustomUser._meta.concrete_fields
+    if field.attname in ('id', 'username', 'role', 'is_staff',
+                         'is_superuser', 'is_active'))
+
+
+def get_user_cache_key(user_id):
+    return f'{USER_CACHE_PREFIX}:{user_id}'
+
+
+def invalidate_user(user_id):
+    cache.delete(get_user_cache_key(user_id))
+
+
+def revoke_token(raw_token):
+    """Отзывает токен до истечения его срока во всех процессах."""
+    token = api_settings.AUTH_TOKEN_CLASSES[0](raw_token)
+    cache.set(f'{REVOKED_TOKEN_PREFIX}:{token[api_settings.JTI_CLAIM]}',
+              True, max(int(token['exp'] - time.time()), 1))
+    verified_token_cache.evict(raw_token)
+    verified_token_cache.bump()
+
+
+def revoke_user_tokens(user_id):
+    """Убирает токены пользователя из кешей проверенных токенов."""
+    verified_token_cache.evict_user(user_id)
+    verified_token_cache.bump()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Аутентификация по JWT без запроса пользователя к БД.
+
+    Проверенные токены хранятся в LRU процесса до истечения срока,
+    поэтому подпись повторно присланного токена не проверяется. Снимок
+    пользователя (id, имя, роль и флаги) хранится в общем кеше
+    `user_cache_timeout` секунд и сбрасывается при сохранении или
+    удалении пользователя. Из снимка собирается экземпляр CustomUser с
+    отложенной загрузкой остальных полей.
+    """
+
+    user_cache_timeout = 60
+
+    def get_validated_token(self, raw_token):
+        token = verified_token_cache.get(raw_token)
+        if token is not None:
+            return token
+        token = super().get_validated_token(raw_token)
+        if cache.get(
+                f'{REVOKED_TOKEN_PREFIX}:{token[api_settings.JTI_CLAIM]}'):
+            raise InvalidToken(_('Token is blacklisted'))
+        verified_token_cache.set(
+            raw_token, token, token.get(api_settings.USER_ID_CLAIM))
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+        key = get_user_cache_key(user_id)
+        snapshot = cache.get(key)
+        record_cache(USER_CACHE_PREFIX, snapshot is not None)
+        if snapshot is None:
+            user = super().get_user(validated_token)
+            cache.set(key, tuple(getattr(user, field)
+                                 for field in USER_SNAPSHOT_FIELDS),
+                      self.user_cache_timeout)
+            return user
+        user = CustomUser.from_db(
+            DEFAULT_DB_ALIAS, USER_SNAPSHOT_FIELDS, snapshot)
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive')
+        return user
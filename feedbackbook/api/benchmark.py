@@ -0,0 +1,292 @@
+"""Замеры производительности эндпоинтов API.
+
+Каждый маршрут из `api/urls.py` вызывается через тестовый клиент:
+сначала несколько прогревочных запросов, в которых считаются SQL-запросы,
+затем один запрос под tracemalloc и серия запросов для задержек.
+Изменяющие запросы выполняются в транзакции, которая откатывается,
+поэтому данные между итерациями не меняются. Потоковые ответы читаются
+целиком, чтобы в замер попала выдача всего тела. Ограничение частоты
+запросов на время замера отключается: его счётчики не откатываются
+вместе с транзакцией, и повторные запросы получали бы ответ 429.
+"""
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+from .urls import urlpatterns
+
+# Данные запроса: словарь или функция от объектов из get_objects().
+Scenario = namedtuple(
+    'Scenario', ('label', 'url_name', 'method', 'data', 'content_type'),
+    defaults=(None,))
+
+BULK_ROWS = 10
+NDJSON = 'application/x-ndjson'
+
+# Маршруты, для которых замеряется не GET-запрос.
+METHODS = {
+    'category-detail': 'delete',
+    'genre-detail': 'delete',
+    'signup': 'post',
+    'token': 'post',
+    'bulk-reviews': 'post',
+    'bulk-comments': 'post',
+}
+CONTENT_TYPES = {
+    'bulk-reviews': NDJSON,
+    'bulk-comments': NDJSON,
+}
+
+
+def bulk_reviews(objects):
+    """Отзывы пользователя замера на первые произведения."""
+    return '\n'.join(json.dumps({
+        'title_id': title_id, 'author': objects['user'].username,
+        'text': 'Отзыв для замера', 'score': 7})
+        for title_id in objects['bulk_titles'])
+
+
+def bulk_comments(objects):
+    return '\n'.join(json.dumps({
+        'review_id': objects['review'].pk, 'author': objects['user'].username,
+        'text': 'Комментарий для замера'}) for _ in range(BULK_ROWS))
+
+
+REQUEST_DATA = {
+    'search-list': {'q': 'фильм'},
+    'signup': {'username': 'benchmark_user',
+               'email': 'benchmark_user@yamdb.fake'},
+    'token': {'username': 'benchmark_user', 'confirmation_code': '0'},
+    'bulk-reviews': bulk_reviews,
+    'bulk-comments': bulk_comments,
+}
+# Дополнительные сценарии для путей, критичных по нагрузке.
+EXTRA_SCENARIOS = (
+    Scenario('title-list?genre', 'title-list', 'get', {'genre': 'genre-1'}),
+    Scenario('title-list?name', 'title-list', 'get', {'name': 'фильм'}),
+    Scenario('title-list?offset', 'title-list', 'get', {'offset': 200}),
+    Scenario('reviews-list?cursor', 'reviews-list', 'get',
+             {'pagination': 'cursor'}),
+)
+URL_KWARGS = {
+    'customuser-detail': lambda objects: {
+        'username': objects['user'].username},
+    'category-detail': lambda objects: {'slug': objects['category'].slug},
+    'genre-detail': lambda objects: {'slug': objects['genre'].slug},
+    'title-detail': lambda objects: {'pk': objects['title'].pk},
+    'reviews-list': lambda objects: {'title_id': objects['title'].pk},
+    'reviews-detail': lambda objects: {
+        'title_id': objects['title'].pk, 'pk': objects['review'].pk},
+    'comments-list': lambda objects: {
+        'title_id': objects['title'].pk, 'review_id': objects['review'].pk},
+    'comments-detail': lambda objects: {
+        'title_id': objects['title'].pk, 'review_id': objects['review'].pk,
+        'pk': objects['comment'].pk},
+}
+PERCENTILES = (50, 95, 99)
+QUIET_LOGGERS = ('django.request', 'core.timing')
+
+
+class BenchmarkError(Exception):
+    """Сценарий не удалось замерить."""
+
+
+def collect_url_names(patterns):
+    """Имена всех маршрутов, включая вложенные."""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= collect_url_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def get_scenarios():
+    scenarios = [Scenario(name, name, METHODS.get(name, 'get'),
+                          REQUEST_DATA.get(name), CONTENT_TYPES.get(name))
+                 for name in sorted(collect_url_names(urlpatterns))]
+    return scenarios + list(EXTRA_SCENARIOS)
+
+
+def get_objects(user):
+    """Объекты для URL: самое популярное произведение и его отзыв."""
+    title = Title.objects.order_by('-reviews_count', 'pk').first()
+    review = (Review.objects.filter(title=title)
+              .annotate(comments_total=Count('comments'))
+              .order_by('-comments_total', 'pk').first())
+    comment = Comment.objects.filter(review=review).order_by('pk').first()
+    category = Category.objects.order_by('pk').first()
+    genre = Genre.objects.order_by('pk').first()
+    # Пользователь замера не писал отзывов: все строки пачки вставляются.
+    bulk_titles = list(Title.objects.order_by('pk')
+                       .values_list('pk', flat=True)[:BULK_ROWS]) or None
+    objects = {'title': title, 'review': review, 'comment': comment,
+               'category': category, 'genre': genre, 'user': user,
+               'bulk_titles': bulk_titles}
+    return {name: obj for name, obj in objects.items() if obj is not None}
+
+
+def build_data(scenario, objects):
+    """Данные запроса или None, если в БД нет нужных объектов."""
+    if not callable(scenario.data):
+        return scenario.data
+    try:
+        return scenario.data(objects)
+    except KeyError:
+        return None
+
+
+def build_url(name, objects):
+    """URL маршрута или None, если в БД нет нужных объектов."""
+    try:
+        kwargs = URL_KWARGS.get(name, lambda objects: {})(objects)
+    except KeyError:
+        return None
+    return reverse(f'api:{name}', kwargs=kwargs)
+
+
+def percentile(samples, value):
+    if len(samples) < 2:
+        return samples[0]
+    return statistics.quantiles(
+        samples, n=100, method='inclusive')[value - 1]
+
+
+class Benchmark:
+    """Прогон сценариев от имени администратора."""
+
+    def __init__(self, user, iterations=50, warmup=5):
+        self.user = user
+        self.iterations = iterations
+        self.warmup = warmup
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def call(self, scenario, url, data):
+        kwargs = {'data': data}
+        if scenario.content_type:
+            kwargs['content_type'] = scenario.content_type
+        response = getattr(self.client, scenario.method)(url, **kwargs)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def request(self, scenario, url, data):
+        if scenario.method == 'get':
+            return self.call(scenario, url, data)
+        with transaction.atomic():
+            response = self.call(scenario, url, data)
+            transaction.set_rollback(True)
+        return response
+
+    def run_scenario(self, scenario, url, data):
+        queries = 0
+        statuses = set()
+        for _ in range(max(self.warmup, 1)):
+            with CaptureQueriesContext(connection) as context:
+                response = self.request(scenario, url, data)
+            queries = max(queries, len(context))
+            statuses.add(response.status_code)
+
+        tracemalloc.start()
+        try:
+            response = self.request(scenario, url, data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        statuses.add(response.status_code)
+
+        samples = []
+        for _ in range(self.iterations):
+            started = time.perf_counter()
+            response = self.request(scenario, url, data)
+            samples.append((time.perf_counter() - started) * 1000)
+            statuses.add(response.status_code)
+        # Задержки запросов с разными ответами сравнивать нельзя.
+        if len(statuses) > 1:
+            raise BenchmarkError(
+                f'{scenario.label}: разные коды ответа '
+                f'{sorted(statuses)}')
+        result = {
+            'method': scenario.method.upper(),
+            'url': url,
+            'status': response.status_code,
+            'queries': queries,
+            'peak_memory_kib': round(peak / 1024, 1),
+            'mean_ms': round(statistics.fmean(samples), 3),
+        }
+        for value in PERCENTILES:
+            result[f'p{value}_ms'] = round(percentile(samples, value), 3)
+        return result
+
+    def run(self, scenarios):
+        objects = get_objects(self.user)
+        # Предупреждения об ответах 4xx и строки замеров каждого запроса
+        # только засоряют вывод.
+        loggers = [logging.getLogger(name) for name in QUIET_LOGGERS]
+        levels = [logger.level for logger in loggers]
+        for logger in loggers:
+            logger.setLevel(logging.ERROR)
+        try:
+            with override_settings(REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}):
+                results = self.run_scenarios(scenarios, objects)
+        finally:
+            for logger, level in zip(loggers, levels):
+                logger.setLevel(level)
+        return results
+
+    def run_scenarios(self, scenarios, objects):
+        results = {}
+        for scenario in scenarios:
+            url = build_url(scenario.url_name, objects)
+            data = build_data(scenario, objects)
+            if url is not None and (data is not None
+                                    or scenario.data is None):
+                results[scenario.label] = self.run_scenario(
+                    scenario, url, data)
+        return results
+
+
+def compare(results, baseline, tolerance, min_delta_ms, metric='p50_ms'):
+    """Возвращает список регрессий относительно базовых результатов.
+
+    Задержка считается регрессией, если метрика выросла больше чем на
+    долю tolerance и больше чем на min_delta_ms. Любой рост числа
+    запросов считается регрессией.
+    """
+    regressions = []
+    for label, result in results.items():
+        base = baseline.get(label)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{label}: SQL-запросов {base["queries"]} -> '
+                f'{result["queries"]}')
+        growth = result[metric] - base[metric]
+        if (growth > min_delta_ms
+                and result[metric] > base[metric] * (1 + tolerance)):
+            regressions.append(
+                f'{label}: {metric} {base[metric]} -> {result[metric]}')
+        if (result['peak_memory_kib']
+                > base['peak_memory_kib'] * (1 + tolerance)):
+            regressions.append(
+                f'{label}: память {base["peak_memory_kib"]} -> '
+                f'{result["peak_memory_kib"]} КиБ')
+    return regressions
@@ -0,0 +1,246 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from reviews.models import Review
+from .metrics import cache_entries, record_cache
+
+REVIEW_EXISTS_PREFIX = 'review-exists'
+REVIEW_EXISTS_TIMEOUT = 300
+SCOPED_VERSION_TIMEOUT = 24 * 60 * 60
+
+
+def get_review_exists_key(title_id, review_id, version=None):
+    if version is None:
+        version = review_exists_version.get()
+    return f'{REVIEW_EXISTS_PREFIX}:{version}:{title_id}:{review_id}'
+
+
+def review_exists(title_id, review_id):
+    """Проверяет, что отзыв относится к произведению.
+
+    Положительный ответ хранится в общем кеше и сбрасывается при
+    удалении отзыва, поэтому чтение комментариев популярного отзыва
+    не обращается к таблице отзывов.
+    """
+    key = get_review_exists_key(title_id, review_id)
+    exists = cache.get(key)
+    record_cache(REVIEW_EXISTS_PREFIX, exists is not None)
+    if exists is None:
+        exists = Review.objects.filter(
+            pk=review_id, title_id=title_id).exists()
+        if exists:
+            cache.set(key, True, REVIEW_EXISTS_TIMEOUT)
+    return exists
+
+
+def forget_review(title_id, review_id):
+    cache.delete(get_review_exists_key(title_id, review_id))
+
+
+def forget_reviews(title_id, review_ids):
+    version = review_exists_version.get()
+    cache.delete_many([get_review_exists_key(title_id, review_id, version)
+                       for review_id in review_ids])
+
+
+class ListVersion:
+    """Номер версии данных в общем кеше Django.
+
+    Версия бывает общей или своей для каждого родителя (`scope`), например
+    для отзывов одного произведения. Изменение данных увеличивает версию,
+    поэтому валидаторы и кеши, построенные по ней, устаревают без
+    обращений к БД. Версия родителя включает общую версию: её увеличение
+    сбрасывает версии всех родителей, например после загрузки CSV.
+    """
+
+    def __init__(self, name, timeout=None):
+        self.name = name
+        self.timeout = timeout
+
+    def get_key(self, scope=None):
+        key = f'list-version:{self.name}'
+        return key if scope is None else f'{key}:{scope}'
+
+    def get(self, scope=None):
+        # Начальная версия берётся из времени, чтобы после потери ключа
+        # в общем кеше она не совпала с уже использованной.
+        if scope is None:
+            return cache.get_or_set(self.get_key(), time.time_ns, self.timeout)
+        keys = (self.get_key(), self.get_key(scope))
+        values = cache.get_many(keys)
+        for key in keys:
+            if key not in values:
+                values[key] = cache.get_or_set(
+                    key, time.time_ns, self.timeout)
+        return '{}.{}'.format(*(values[key] for key in keys))
+
+    def bump(self, scope=None):
+        key = self.get_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), self.timeout)
+
+    def bump_on_commit(self, scope=None):
+        transaction.on_commit(lambda: self.bump(scope))
+
+
+class VersionedListCache:
+    """Кеш сериализованных списков в памяти процесса.
+
+    Записи привязаны к номеру версии, который хранится в общем кеше
+    Django. Изменение данных увеличивает версию, и каждый процесс при
+    следующем запросе перестаёт использовать свои старые записи.
+    """
+
+    def __init__(self, name, max_entries=128):
+        self.name = name
+        self.version = ListVersion(name)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_version(self):
+        return self.version.get()
+
+    def bump(self):
+        self.version.bump()
+
+    def get_etag(self, version, key):
+        digest = hashlib.md5(key.encode()).hexdigest()[:16]
+        return f'"{self.name}-{version}-{digest}"'
+
+    def get(self, version, key):
+        with self._lock:
+            data = self._entries.get((version, key))
+            if data is not None:
+                self._entries.move_to_end((version, key))
+        record_cache(self.name, data is not None)
+        return data
+
+    def set(self, version, key, data):
+        with self._lock:
+            self._entries[(version, key)] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class VerifiedTokenCache:
+    """LRU проверенных JWT в памяти процесса.
+
+    Ключ - sha256 исходного токена, значение - проверенный токен до
+    истечения его exp. Отзыв токенов увеличивает версию в общем кеше;
+    процессы сверяют её не чаще раза в `poll_interval` секунд и при
+    изменении очищают свои записи.
+    """
+
+    name = 'jwt-tokens'
+    version_key = 'jwt-revocations-version'
+    poll_interval = 1.0
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._users = defaultdict(set)
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+
+    @staticmethod
+    def get_key(raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).digest()
+
+    def _sync(self):
+        now = time.monotonic()
+        if (self._checked_at is not None
+                and now - self._checked_at < self.poll_interval):
+            return
+        self._checked_at = now
+        version = cache.get(self.version_key)
+        if version != self._version:
+            self._version = version
+            self.clear()
+
+    def _remove(self, key):
+        token, _, user_id = self._entries.pop(key)
+        self._users[user_id].discard(key)
+        if not self._users[user_id]:
+            del self._users[user_id]
+        cache_entries.dec(cache=self.name)
+        return token
+
+    def get(self, raw_token):
+        self._sync()
+        key = self.get_key(raw_token)
+        token = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > time.time():
+                    self._entries.move_to_end(key)
+                    token = entry[0]
+                else:
+                    self._remove(key)
+        record_cache(self.name, token is not None)
+        return token
+
+    def set(self, raw_token, token, user_id):
+        key = self.get_key(raw_token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (token, token['exp'], user_id)
+            self._users[user_id].add(key)
+            cache_entries.inc(cache=self.name)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def evict(self, raw_token):
+        with self._lock:
+            key = self.get_key(raw_token)
+            if key in self._entries:
+                self._remove(key)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            for key in list(self._users.get(user_id, ())):
+                self._remove(key)
+
+    def bump(self):
+        """Сообщает всем процессам, что часть токенов отозвана."""
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), None)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+category_list_cache = VersionedListCache('categories')
+genre_list_cache = VersionedListCache('genres')
+title_list_version = ListVersion('titles')
+title_count_version = ListVersion('titles-count')
+review_list_version = ListVersion('reviews', SCOPED_VERSION_TIMEOUT)
+comment_list_version = ListVersion('comments', SCOPED_VERSION_TIMEOUT)
+# Имена авторов входят в отзывы и комментарии, но не меняют их updated_at.
+author_version = ListVersion('authors')
+review_exists_version = ListVersion(REVIEW_EXISTS_PREFIX)
+verified_token_cache = VerifiedTokenCache(settings.JWT_TOKEN_CACHE_SIZE)
@@ -1,20 +1,97 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
 from django_filters import rest_framework as filters
 
-from reviews.models import Title
+from core.utils import normalize_text
+from reviews.models import Comment, Review, Title, TitleGenre
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Фильтр по списку строк через запятую."""
 
 
 class TitleFilter(filters.FilterSet):
-    """Фильтр произведений."""
+    """Фильтр произведений.
+
+    Основные фильтры используют индексы: точный год и диапазон лет,
+    точный слаг категории и жанров, префикс нормализованного названия.
+    Поиск по подстроке доступен в параметрах `*_contains`.
+    """
 
-    category = filters.CharFilter(
+    category = filters.CharFilter(field_name='category__slug')
+    category_contains = filters.CharFilter(
         field_name='category__slug', lookup_expr='icontains')
-    genre = filters.CharFilter(
-        field_name='genre__slug', lookup_expr='icontains')
-    name = filters.CharFilter(
+    genre = CharInFilter(method='filter_genre')
+    genre_contains = filters.CharFilter(
+        field_name='genre__slug', lookup_expr='icontains', distinct=True)
+    name = filters.CharFilter(method='filter_name_prefix')
+    name_contains = filters.CharFilter(
         field_name='name', lookup_expr='icontains')
-    year = filters.NumberFilter(
-        field_name='year', lookup_expr='icontains')
+    year = filters.NumberFilter(field_name='year')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = '__all__'
+        exclude = ('name_normalized', 'reviews_count', 'score_sum')
+
+    def filter_genre(self, queryset, name, value):
+        return queryset.filter(pk__in=TitleGenre.objects.filter(
+            genre__slug__in=value).values('title_id'))
+
+    def filter_name_prefix(self, queryset, name, value):
+        prefix = normalize_text(value)
+        return queryset.filter(name_normalized__gte=prefix,
+                               name_normalized__lt=prefix + '\U0010ffff')
+
+
+class ExportFilter(filters.FilterSet):
+    """Фильтр выгрузки по произведению, категории и датам публикации.
+
+    Границы дат переводятся в моменты времени, поэтому сравнение идёт по
+    индексу pub_date без функции над столбцом.
+    """
+
+    title = filters.NumberFilter(method='filter_title')
+    category = filters.CharFilter(method='filter_category')
+    date_from = filters.DateFilter(method='filter_date_from')
+    date_to = filters.DateFilter(method='filter_date_to')
+
+    # Путь к произведению от модели выгрузки.
+    title_path = 'title'
+
+    def filter_title(self, queryset, name, value):
+        return queryset.filter(**{f'{self.title_path}_id': value})
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(
+            **{f'{self.title_path}__category__slug': value})
+
+    @staticmethod
+    def get_moment(date):
+        return timezone.make_aware(datetime.combine(date, time.min))
+
+    def filter_date_from(self, queryset, name, value):
+        return queryset.filter(pub_date__gte=self.get_moment(value))
+
+    def filter_date_to(self, queryset, name, value):
+        return queryset.filter(
+            pub_date__lt=self.get_moment(value + timedelta(days=1)))
+
+
+class ReviewExportFilter(ExportFilter):
+
+    class Meta:
+        model = Review
+        fields = ('title', 'category', 'date_from', 'date_to')
+
+
+class CommentExportFilter(ExportFilter):
+
+    title_path = 'review__title'
+
+    class Meta:
+        model = Comment
+        fields = ('title', 'category', 'date_from', 'date_to')
@@ -0,0 +1,246 @@
+"""Пакетная загрузка отзывов и комментариев в формате NDJSON.
+
+Каждая строка тела - JSON-объект с одной записью. Сначала проверяются
+поля каждой строки, затем для всей пачки сразу: наличие произведений,
+отзывов и авторов и уникальность отзывов в пачке и в БД - по одному
+запросу на проверку. Прошедшие проверку строки вставляются bulk_create,
+рейтинги затронутых произведений пересчитываются один раз на пачку.
+"""
+import json
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from core.constants import MAX_SCORE, MIN_SCORE
+from reviews import search
+from reviews.models import Comment, CustomUser, Review, Title
+from .caches import (comment_list_version, review_list_version,
+                     title_list_version)
+from .metrics import bulk_rows
+
+CREATED = 'created'
+ERROR = 'error'
+REQUIRED = 'Обязательное поле.'
+
+
+class NDJSONParser(BaseParser):
+    """Разбирает тело на пары (номер строки, объект или None)."""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        rows = []
+        try:
+            for number, line in enumerate(stream, 1):
+                line = line.decode(encoding).strip()
+                if not line:
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    data = None
+                rows.append((number, data if isinstance(data, dict)
+                             else None))
+        except UnicodeDecodeError as error:
+            raise ParseError(f'Ошибка кодировки NDJSON: {error}')
+        return rows
+
+
+def get_int(data, field, errors):
+    value = data.get(field)
+    if value is None:
+        errors[field] = [REQUIRED]
+    elif isinstance(value, bool) or not isinstance(value, int):
+        errors[field] = ['Ожидается целое число.']
+    return value
+
+
+def get_text(data, field, errors):
+    value = data.get(field)
+    if not isinstance(value, str) or not value.strip():
+        errors[field] = [REQUIRED]
+    return value
+
+
+class Ingester:
+    """Проверка и вставка пачки строк одной модели."""
+
+    model = None
+    kind = None
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def clean(self, data, errors):
+        """Значения полей строки; ошибки добавляются в `errors`."""
+        raise NotImplementedError
+
+    def check(self, rows):
+        """Проверки по БД для всей пачки: {номер строки: ошибки}."""
+        raise NotImplementedError
+
+    def get_authors(self, rows):
+        names = {values['author'] for _, values in rows}
+        return dict(CustomUser.objects.filter(username__in=names)
+                    .values_list('username', 'pk'))
+
+    def insert(self, rows):
+        """Вставляет строки, прошедшие проверку; возвращает объекты."""
+        raise NotImplementedError
+
+    def validate(self):
+        results = {}
+        valid = []
+        for number, data in self.rows:
+            if data is None:
+                results[number] = {'non_field_errors': [
+                    'Строка должна быть JSON-объектом.']}
+                continue
+            errors = {}
+            values = self.clean(data, errors)
+            if errors:
+                results[number] = errors
+            else:
+                valid.append((number, values))
+        return results, valid
+
+    def run(self):
+        """Результаты по строкам в порядке строк тела запроса."""
+        results, valid = self.validate()
+        # Параллельная загрузка может вставить те же отзывы между
+        # проверкой и вставкой: проверка повторяется один раз.
+        for attempt in range(2):
+            errors = self.check(valid)
+            rows = [row for row in valid if row[0] not in errors]
+            try:
+                with transaction.atomic():
+                    objects = self.insert(rows) if rows else []
+                break
+            except IntegrityError:
+                if attempt:
+                    raise
+        results.update(errors)
+        created = {number: obj.pk
+                   for (number, _), obj in zip(rows, objects)}
+        bulk_rows.inc(len(created), kind=self.kind, result=CREATED)
+        bulk_rows.inc(len(results), kind=self.kind, result=ERROR)
+        return [self.get_result(number, created, results)
+                for number, _ in self.rows]
+
+    @staticmethod
+    def get_result(number, created, errors):
+        if number not in created:
+            return {'line': number, 'status': ERROR,
+                    'errors': errors[number]}
+        result = {'line': number, 'status': CREATED}
+        # Без RETURNING в bulk_create ключи комментариев неизвестны.
+        if created[number] is not None:
+            result['id'] = created[number]
+        return result
+
+
+class ReviewIngester(Ingester):
+    model = Review
+    kind = 'reviews'
+
+    def clean(self, data, errors):
+        values = {
+            'title_id': get_int(data, 'title_id', errors),
+            'author': get_text(data, 'author', errors),
+            'text': get_text(data, 'text', errors),
+            'score': get_int(data, 'score', errors),
+        }
+        if 'score' not in errors and not (
+                MIN_SCORE <= values['score'] <= MAX_SCORE):
+            errors['score'] = [f'Оценка от {MIN_SCORE} до {MAX_SCORE}.']
+        return values
+
+    def check(self, rows):
+        errors = {}
+        authors = self.get_authors(rows)
+        title_ids = {values['title_id'] for _, values in rows}
+        titles = set(Title.objects.filter(pk__in=title_ids)
+                     .values_list('pk', flat=True))
+        existing = set(Review.objects.filter(
+            title_id__in=titles, author_id__in=authors.values())
+            .values_list('title_id', 'author_id'))
+        for number, values in rows:
+            author_id = authors.get(values['author'])
+            if values['title_id'] not in titles:
+                errors[number] = {'title_id': ['Произведение не найдено.']}
+            elif author_id is None:
+                errors[number] = {'author': ['Пользователь не найден.']}
+            elif (values['title_id'], author_id) in existing:
+                errors[number] = {'non_field_errors': [
+                    'Отзыв автора на произведение уже существует.']}
+            else:
+                # Следующие строки той же пары в пачке - повторы.
+                existing.add((values['title_id'], author_id))
+                values['author_id'] = author_id
+        return errors
+
+    def insert(self, rows):
+        reviews = self.model.objects.bulk_create([
+            Review(title_id=values['title_id'],
+                   author_id=values['author_id'],
+                   text=values['text'], score=values['score'])
+            for _, values in rows])
+        title_ids = {review.title_id for review in reviews}
+        if reviews[0].pk is None:
+            # Бэкенд не возвращает ключи из bulk_create: они находятся
+            # по уникальной паре произведение - автор.
+            inserted = Review.objects.filter(
+                title_id__in=title_ids,
+                author_id__in={review.author_id for review in reviews},
+            ).values_list('title_id', 'author_id', 'pk')
+            pks = {(title_id, author_id): pk
+                   for title_id, author_id, pk in inserted}
+            for review in reviews:
+                review.pk = pks[review.title_id, review.author_id]
+        search.index_reviews(reviews)
+        Title.objects.filter(pk__in=title_ids).recalculate_rating()
+        # bulk_create не отправляет сигналы: версии списков для ETag
+        # увеличиваются здесь.
+        for title_id in title_ids:
+            review_list_version.bump_on_commit(title_id)
+        title_list_version.bump_on_commit()
+        return reviews
+
+
+class CommentIngester(Ingester):
+    model = Comment
+    kind = 'comments'
+
+    def clean(self, data, errors):
+        return {
+            'review_id': get_int(data, 'review_id', errors),
+            'author': get_text(data, 'author', errors),
+            'text': get_text(data, 'text', errors),
+        }
+
+    def check(self, rows):
+        errors = {}
+        authors = self.get_authors(rows)
+        reviews = set(Review.objects.filter(
+            pk__in={values['review_id'] for _, values in rows})
+            .values_list('pk', flat=True))
+        for number, values in rows:
+            author_id = authors.get(values['author'])
+            if values['review_id'] not in reviews:
+                errors[number] = {'review_id': ['Отзыв не найден.']}
+            elif author_id is None:
+                errors[number] = {'author': ['Пользователь не найден.']}
+            else:
+                values['author_id'] = author_id
+        return errors
+
+    def insert(self, rows):
+        comments = self.model.objects.bulk_create([
+            Comment(review_id=values['review_id'],
+                    author_id=values['author_id'], text=values['text'])
+            for _, values in rows])
+        for review_id in {comment.review_id for comment in comments}:
+            comment_list_version.bump_on_commit(review_id)
+        return comments
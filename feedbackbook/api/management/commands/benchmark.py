@@ -0,0 +1,160 @@
+"""Команда замера эндпоинтов API: python manage.py benchmark."""
+import contextlib
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from api import benchmark
+from reviews.models import CustomUser
+
+BENCHMARK_USERNAME = 'benchmark_admin'
+
+
+@contextlib.contextmanager
+def test_environment():
+    """Тестовое окружение Django, если оно ещё не настроено."""
+    try:
+        setup_test_environment()
+    except RuntimeError:
+        yield
+        return
+    try:
+        yield
+    finally:
+        teardown_test_environment()
+
+
+class Command(BaseCommand):
+    """Класс замера задержек, SQL-запросов и памяти по маршрутам API.
+
+    По умолчанию создаёт временную тестовую БД и заполняет её командой
+    generate_dataset, рабочая БД при этом не затрагивается.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=50,
+            help='Количество замеряемых запросов на сценарий.')
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Количество прогревочных запросов на сценарий.')
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON.')
+        parser.add_argument(
+            '--compare',
+            help='Файл базовых результатов для поиска регрессий.')
+        parser.add_argument(
+            '--metric', default='p50',
+            choices=[f'p{value}' for value in benchmark.PERCENTILES],
+            help='Перцентиль задержки, сравниваемый с базовым.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый относительный рост задержки и памяти.')
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=1.0,
+            help='Рост задержки меньше этого значения (мс) регрессией '
+                 'не считается.')
+        parser.add_argument(
+            '--use-existing-db', action='store_true',
+            help='Замерять на текущей БД без генерации данных.')
+        for name, default in (('users', 2000), ('titles', 500),
+                              ('reviews', 20000), ('comments', 5000)):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Размер генерируемых данных ({name}).')
+        parser.add_argument(
+            '--seed', default='benchmark',
+            help='Зерно генератора данных.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('Количество итераций должно быть больше нуля.')
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)['results']
+        with test_environment():
+            if options['use_existing_db']:
+                results = self.run(options)
+            else:
+                old_name = connection.settings_dict['NAME']
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True)
+                try:
+                    self.generate(options)
+                    results = self.run(options)
+                finally:
+                    connection.creation.destroy_test_db(
+                        old_name, verbosity=0)
+        self.report(results)
+        if options['output']:
+            self.save(options, results)
+        if baseline is not None:
+            regressions = benchmark.compare(
+                results, baseline, options['tolerance'],
+                options['min_delta_ms'], f'{options["metric"]}_ms')
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            if regressions:
+                raise CommandError(
+                    f'Обнаружено регрессий: {len(regressions)}')
+            self.stdout.write(self.style.SUCCESS('Регрессий не обнаружено'))
+
+    def generate(self, options):
+        call_command(
+            'generate_dataset', users=options['users'],
+            titles=options['titles'], reviews=options['reviews'],
+            comments=options['comments'], seed=options['seed'],
+            stdout=self.stdout)
+        CustomUser.objects.create_user(
+            username=BENCHMARK_USERNAME,
+            email=f'{BENCHMARK_USERNAME}@yamdb.fake',
+            role=CustomUser.ADMIN)
+
+    def run(self, options):
+        user = (CustomUser.objects.filter(username=BENCHMARK_USERNAME).first()
+                or CustomUser.objects.filter(role=CustomUser.ADMIN)
+                .order_by('pk').first())
+        if user is None:
+            raise CommandError('В БД нет пользователя с ролью admin.')
+        runner = benchmark.Benchmark(
+            user, options['iterations'], options['warmup'])
+        try:
+            return runner.run(benchmark.get_scenarios())
+        except benchmark.BenchmarkError as error:
+            raise CommandError(str(error))
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"сценарий":<24}{"код":>5}{"SQL":>5}{"p50":>9}{"p95":>9}'
+            f'{"p99":>9}{"КиБ":>9}')
+        for label, result in results.items():
+            self.stdout.write(
+                f'{label:<24}{result["status"]:>5}{result["queries"]:>5}'
+                f'{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}'
+                f'{result["p99_ms"]:>9.2f}{result["peak_memory_kib"]:>9.1f}')
+
+    def save(self, options, results):
+        data = {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'dataset': None if options['use_existing_db'] else {
+                    name: options[name] for name in (
+                        'users', 'titles', 'reviews', 'comments', 'seed')},
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты записаны в {options["output"]}'))
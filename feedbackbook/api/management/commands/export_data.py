@@ -0,0 +1,62 @@
+"""Команда выгрузки отзывов и комментариев: python manage.py export_data."""
+import sys
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management import BaseCommand, CommandError
+
+from api import export
+
+FILTERS = ('title', 'category', 'date_from', 'date_to')
+
+
+class Command(BaseCommand):
+    """Потоковая выгрузка в NDJSON или CSV, как эндпоинт /export/."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=tuple(export.EXPORTS))
+        parser.add_argument(
+            '--output', choices=tuple(export.CONTENT_TYPES),
+            default=export.NDJSON, help='Формат выгрузки.')
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжать выгрузку gzip.')
+        parser.add_argument(
+            '--file', help='Файл выгрузки, по умолчанию stdout.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за раз.')
+        parser.add_argument('--title', help='Id произведения.')
+        parser.add_argument('--category', help='Слаг категории.')
+        parser.add_argument(
+            '--date-from', help='Дата публикации с, ГГГГ-ММ-ДД.')
+        parser.add_argument(
+            '--date-to', help='Дата публикации по, ГГГГ-ММ-ДД.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        params = {name: options[name] for name in FILTERS
+                  if options[name] is not None}
+        try:
+            chunks = export.stream(
+                options['kind'], params, options['output'],
+                options['gzip'], options['chunk_size'])
+        except ValidationError as error:
+            raise CommandError(f'Неверные фильтры: {error.message_dict}')
+        started = time.perf_counter()
+        size = 0
+        file = (open(options['file'], 'wb') if options['file']
+                else sys.stdout.buffer)
+        try:
+            for chunk in chunks:
+                file.write(chunk)
+                size += len(chunk)
+        finally:
+            if options['file']:
+                file.close()
+            else:
+                file.flush()
+        if options['file']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Выгрузка {options["kind"]} записана в {options["file"]}: '
+                f'{size} байт за {time.perf_counter() - started:.2f} с'))
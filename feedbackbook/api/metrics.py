@@ -0,0 +1,57 @@
+"""Метрики API: регистрации, токены, ограничения, пакетная загрузка,
+кеши и очередь писем.
+"""
+from django.db.models import Count
+
+from core.constants import EMAIL_STATUSES
+from core.metrics import Counter, Gauge, register_collector
+from reviews.models import OutgoingEmail
+
+signups = Counter(
+    'yamdb_signups', 'Количество запросов кода подтверждения.')
+tokens = Counter(
+    'yamdb_tokens', 'Количество запросов токена по результату.',
+    ('result',))
+throttled = Counter(
+    'yamdb_throttled_requests', 'Количество отклонённых частых запросов.',
+    ('scope',))
+bulk_rows = Counter(
+    'yamdb_bulk_rows', 'Строки пакетной загрузки по результату.',
+    ('kind', 'result'))
+cache_requests = Counter(
+    'yamdb_cache_requests', 'Обращения к кешам по результату.',
+    ('cache', 'result'))
+cache_entries = Gauge(
+    'yamdb_cache_entries', 'Количество записей в кешах процессов.',
+    ('cache',))
+
+
+def record_cache(name, hit):
+    cache_requests.inc(cache=name, result='hit' if hit else 'miss')
+
+
+@register_collector
+def outbox_depth(values):
+    counts = dict(OutgoingEmail.objects.order_by()
+                  .values_list('status').annotate(total=Count('pk')))
+    return [('yamdb_outbox_emails', 'gauge',
+             'Количество писем в очереди по статусу.',
+             [({'status': status}, counts.get(status, 0))
+              for status, _ in EMAIL_STATUSES])]
+
+
+@register_collector
+def cache_hit_ratio(values):
+    totals = {}
+    for (sample, labels), value in values.items():
+        if sample == 'yamdb_cache_requests_total':
+            labels = dict(labels)
+            hits, requests = totals.get(labels['cache'], (0, 0))
+            if labels['result'] == 'hit':
+                hits += value
+            totals[labels['cache']] = hits, requests + value
+    return [('yamdb_cache_hit_ratio', 'gauge',
+             'Доля попаданий в кеш с запуска сервиса.',
+             [({'cache': name}, hits / requests)
+              for name, (hits, requests) in sorted(totals.items())
+              if requests])]
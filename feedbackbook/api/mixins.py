@@ -1,4 +1,9 @@
-from rest_framework import mixins, viewsets, filters
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import mixins, viewsets, filters, status
+from rest_framework.response import Response
 
 from .permissions import IsAdminOrReadOnlyPermission
 
@@ -7,8 +12,93 @@ class ListCreateDestroy(mixins.ListModelMixin,
                         mixins.CreateModelMixin,
                         mixins.DestroyModelMixin,
                         viewsets.GenericViewSet):
+    """Список, создание и удаление справочника с кешем списка.
+
+    Сериализованный список хранится в `list_cache` и отдаётся с ETag;
+    клиент с совпадающим If-None-Match получает 304 без тела.
+    """
 
     permission_classes = (IsAdminOrReadOnlyPermission,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('^slug', '^name')
     lookup_field = 'slug'
+    list_cache = None
+
+    def list(self, request, *args, **kwargs):
+        version = self.list_cache.get_version()
+        key = request.query_params.urlencode()
+        etag = self.list_cache.get_etag(version, key)
+        headers = {'ETag': etag}
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+        data = self.list_cache.get(version, key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            self.list_cache.set(version, key, data)
+        return Response(data, headers=headers)
+
+
+class ConditionalGetMixin:
+    """Условные запросы без сериализации ответа и без запросов к БД.
+
+    Валидатор объекта строится по его updated_at, валидатор списка - по
+    версии `list_version` для родителя из get_list_scope(). В оба входят
+    версии `related_versions`: данные вложенных полей (категории, жанры,
+    имена авторов) не меняют updated_at объекта.
+    GET отвечает 304, PATCH с устаревшим If-Match — 412.
+    """
+
+    list_version = None
+    related_versions = ()
+
+    def get_object(self):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def get_list_scope(self):
+        return None
+
+    def get_conditional_response(self, key, last_modified=None):
+        timestamp = last_modified and int(last_modified.timestamp())
+        related = ':'.join(
+            str(version.get()) for version in self.related_versions)
+        etag = quote_etag(hashlib.md5(
+            f'{key}:{related}:{last_modified and last_modified.isoformat()}'
+            .encode()).hexdigest())
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=timestamp)
+        headers = {'ETag': etag}
+        if timestamp:
+            headers['Last-Modified'] = http_date(timestamp)
+        return response, headers
+
+    def finalize_conditional(self, response, headers):
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        version = self.list_version.get(self.get_list_scope())
+        response, headers = self.get_conditional_response(
+            f'{request.query_params.urlencode()}:{version}')
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return self.finalize_conditional(response, headers)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        response, headers = self.get_conditional_response(
+            instance.pk, instance.updated_at)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return self.finalize_conditional(response, headers)
+
+    def update(self, request, *args, **kwargs):
+        instance = self.get_object()
+        response, _ = self.get_conditional_response(
+            instance.pk, instance.updated_at)
+        if response is not None:
+            return response
+        return super().update(request, *args, **kwargs)
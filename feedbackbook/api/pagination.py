@@ -0,0 +1,268 @@
+import hashlib
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination,
+                                       Cursor,
+                                       CursorPagination,
+                                       LimitOffsetPagination)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param
+
+from .caches import title_count_version
+from .metrics import record_cache
+
+
+def estimate_count(queryset):
+    """Оценивает количество строк таблицы без полного сканирования."""
+    model = queryset.model
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+class PubDateCursorPagination(CursorPagination):
+    """Курсорная пагинация по паре (pub_date, id) без COUNT и OFFSET.
+
+    Курсор хранит дату публикации и id крайней строки страницы. Пара
+    уникальна, поэтому строки с одинаковой датой разделяются условием
+    по id, а не смещением.
+    """
+
+    ordering = ('-pub_date', '-id')
+    position_separator = ','
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor and self.cursor.position
+        if reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            pub_date, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk))
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Перед пустой страницей строк нет: следующая - первая.
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False,
+            position=self._get_position_from_instance(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        # После пустой страницы строк нет: предыдущая - последняя.
+        position = (self._get_position_from_instance(self.page[0])
+                    if self.page else None)
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        pub_date, _, pk = cursor.position.rpartition(self.position_separator)
+        try:
+            position = parse_datetime(pub_date), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def _get_position_from_instance(self, instance, ordering=None):
+        return (f'{instance.pub_date.isoformat()}'
+                f'{self.position_separator}{instance.pk}')
+
+
+class VersionedCountPagination(LimitOffsetPagination):
+    """Пагинация смещением с COUNT, закешированным по версии списка.
+
+    Ключ строится из версии списка представления (`list_version` для
+    `get_list_scope()`), которую увеличивает запись, поэтому повторное
+    чтение списка без фильтров не выполняет COUNT.
+    """
+
+    count_cache_prefix = 'list-count'
+    count_cache_timeout = 24 * 60 * 60
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        list_version = self.view.list_version
+        scope = self.view.get_list_scope()
+        key = (f'{self.count_cache_prefix}:{list_version.name}:{scope}:'
+               f'{list_version.get(scope)}')
+        count = cache.get(key)
+        record_cache(self.count_cache_prefix, count is not None)
+        if count is None:
+            count = super().get_count(queryset)
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+
+class OffsetOrCursorPagination(BasePagination):
+    """Пагинация смещением по умолчанию и курсором по запросу клиента.
+
+    Курсорный режим включается параметром `?pagination=cursor`, ссылки
+    next/previous в нём уже содержат параметр `cursor`.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    offset_class = LimitOffsetPagination
+    cursor_class = PubDateCursorPagination
+
+    def __init__(self):
+        self.paginator = self.offset_class()
+
+    def use_cursor(self, request):
+        return (request.query_params.get(self.mode_query_param)
+                == self.cursor_mode
+                or self.cursor_class.cursor_query_param
+                in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.paginator = self.cursor_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_schema_fields(self, view):
+        return (self.offset_class().get_schema_fields(view)
+                + self.cursor_class().get_schema_fields(view))
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.offset_class().get_schema_operation_parameters(view)
+            + self.cursor_class().get_schema_operation_parameters(view)
+            + [{
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Режим пагинации: cursor.',
+                'schema': {'type': 'string', 'enum': [self.cursor_mode]},
+            }])
+
+
+class CachedCountPagination(LimitOffsetPagination):
+    """Пагинация смещением с кешированным COUNT по набору фильтров.
+
+    Количество хранится в кеше под ключом из нормализованных параметров
+    фильтрации и версии, которую сбрасывает запись произведений. Для
+    запроса без фильтров с `?count=estimated` количество оценивается.
+    """
+
+    count_mode_query_param = 'count'
+    estimated_mode = 'estimated'
+    count_cache_prefix = 'titles-count'
+    count_cache_timeout = 60
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count_exact = True
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_filter_params(self):
+        ignored = (self.limit_query_param, self.offset_query_param,
+                   self.count_mode_query_param)
+        params = []
+        for key, values in self.request.query_params.lists():
+            values = sorted(value.strip() for value in values
+                            if value.strip())
+            if key not in ignored and values:
+                params.append((key, values))
+        return sorted(params)
+
+    def get_count_cache_key(self, params):
+        version = title_count_version.get()
+        digest = hashlib.md5(repr(params).encode()).hexdigest()
+        return f'{self.count_cache_prefix}:{version}:{digest}'
+
+    def get_count(self, queryset):
+        params = self.get_filter_params()
+        if (not params and self.request.query_params.get(
+                self.count_mode_query_param) == self.estimated_mode):
+            self.count_exact = False
+            return estimate_count(queryset)
+        key = self.get_count_cache_key(params)
+        count = cache.get(key)
+        record_cache(self.count_cache_prefix, count is not None)
+        if count is None:
+            count = super().get_count(queryset)
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('count_exact', self.count_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_exact'] = {'type': 'boolean'}
+        return response_schema
+
+
+class CommentPagination(OffsetOrCursorPagination):
+    """Пагинация комментариев с кешированным количеством."""
+
+    offset_class = VersionedCountPagination
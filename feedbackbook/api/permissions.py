@@ -1,6 +1,17 @@
 from rest_framework import permissions
 
 
+def is_moderator_or_admin(request):
+    """Решение по роли пользователя, вычисляется один раз за запрос."""
+    try:
+        return request.moderator_or_admin
+    except AttributeError:
+        user = request.user
+        request.moderator_or_admin = user.is_authenticated and (
+            user.is_moderator or user.is_admin)
+        return request.moderator_or_admin
+
+
 class IsAdminOrReadOnlyPermission(permissions.BasePermission):
     """Разрешение админа или только чтение."""
 
@@ -17,11 +28,10 @@ class IsAuthorOrAdminPermission(permissions.BasePermission):
                 or request.user.is_authenticated)
 
     def has_object_permission(self, request, view, obj):
-
+        # author_id не требует загрузки автора объекта.
         return (request.method in permissions.SAFE_METHODS
-                or obj.author == request.user
-                or request.user.is_moderator
-                or request.user.is_admin)
+                or obj.author_id == request.user.pk
+                or is_moderator_or_admin(request))
 
 
 class IsAdminPermission(permissions.BasePermission):
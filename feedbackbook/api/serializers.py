@@ -1,5 +1,8 @@
 import re
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers, status
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
@@ -16,9 +19,10 @@ from core.constants import (EMAILFIELD_MAX_LENGTH,
 from core.validators import (username_validator,
                              year_validator,
                              CustomValidation)
+from core.instrumentation import TimedSerializerMixin
 
 
-class SignUpSerializer(serializers.Serializer):
+class SignUpSerializer(TimedSerializerMixin, serializers.Serializer):
     """Сериализатор регистрации."""
 
     username = serializers.CharField(max_length=USER_CHARFIELD_MAX_LENGTH)
@@ -29,18 +33,29 @@ class SignUpSerializer(serializers.Serializer):
         return value
 
     def validate(self, data):
+        """Проверяет пару имя - почта одним запросом.
+
+        Найденный пользователь с той же парой сохраняется в `self.user`.
+        """
         username = data.get('username')
         email = data.get('email')
-
-        if (CustomUser.objects.filter(username=username).exists()
-                and CustomUser.objects.get(username=username).email != email):
+        users = CustomUser.objects.filter(
+            Q(username=username) | Q(email=email))[:2]
+        by_username = by_email = None
+        for user in users:
+            if user.username == username:
+                by_username = user
+            if user.email == email:
+                by_email = user
+
+        if by_username is not None and by_username.email != email:
             raise serializers.ValidationError(
                 'Такая почта уже существует')
-        if (CustomUser.objects.filter(email=email).exists()
-                and CustomUser.objects.get(email=email).username != username):
+        if by_email is not None and by_email.username != username:
             raise serializers.ValidationError(
                 'Такое имя пользователя уже существует')
 
+        self.user = by_username
         return data
 
 
@@ -57,7 +72,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
                                status.HTTP_404_NOT_FOUND)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для модели CustomUser."""
 
     role = serializers.ChoiceField(choices=USER_ROLES, default=USER)
@@ -92,12 +107,12 @@ class ProfileSerializer(UserSerializer):
     role = serializers.CharField(read_only=True)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для модели Category."""
 
     class Meta:
         model = Category
-        exclude = ('id', )
+        exclude = ('id', 'updated_at')
         validators = [
             serializers.UniqueTogetherValidator(
                 queryset=Category.objects.all(),
@@ -105,12 +120,12 @@ class CategorySerializer(serializers.ModelSerializer):
                 message=('Такая категория уже существует!'), )]
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для модели Genre."""
 
     class Meta:
         model = Genre
-        exclude = ('id', )
+        exclude = ('id', 'updated_at')
         validators = [
             serializers.UniqueTogetherValidator(
                 queryset=Genre.objects.all(),
@@ -118,7 +133,7 @@ class GenreSerializer(serializers.ModelSerializer):
                 message=('Такая категория уже существует!'), )]
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для модели Title."""
 
     category = CategorySerializer()
@@ -127,7 +142,8 @@ class TitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('name_normalized', 'reviews_count', 'score_sum',
+                   'updated_at')
 
     def validate_year(self, value):
         year_validator(value)
@@ -144,7 +160,7 @@ class TitlesCreateSerializer(TitleSerializer):
         many=True)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для модели Review."""
 
     author = serializers.SlugRelatedField(
@@ -152,25 +168,21 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        exclude = ('title',)
-
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
+        exclude = ('title', 'updated_at')
 
-        user = self.context['request'].user
-        title_id = self.context['view'].kwargs.get('title_id')
+    def create(self, validated_data):
+        # Повторный отзыв отклоняет ограничение unique_author_title.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже оставили отзыв на данное произведение. '
+                    'Можете его отредактировать.']})
 
-        if Review.objects.filter(title_id=title_id,
-                                 author_id=user.id).exists():
-            raise serializers.ValidationError(
-                'Вы уже оставили отзыв на данное произведение. '
-                'Можете его отредактировать.')
 
-        return data
-
-
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для модели Comment."""
 
     author = serializers.SlugRelatedField(
@@ -178,4 +190,15 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        exclude = ('review',)
+        exclude = ('review', 'updated_at')
+
+
+class SearchResultSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Сериализатор результата полнотекстового поиска."""
+
+    kind = serializers.CharField()
+    id = serializers.IntegerField()
+    title_id = serializers.IntegerField()
+    name = serializers.CharField()
+    snippet = serializers.CharField()
+    rank = serializers.FloatField()
@@ -0,0 +1,150 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from reviews.loading import rows_written
+from reviews.models import (Category, Comment, CustomUser, Genre, Review,
+                            Title, TitleGenre)
+from reviews.signals import is_review_deleting, is_title_deleting
+from .authentication import invalidate_user, revoke_user_tokens
+from .caches import (author_version, category_list_cache,
+                     comment_list_version, forget_review, forget_reviews,
+                     genre_list_cache, review_exists_version,
+                     review_list_version, title_count_version,
+                     title_list_version)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(m2m_changed, sender=Title.genre.through)
+def reset_title_counts(sender, **kwargs):
+    """Сбрасывает счётчики списка произведений после фиксации."""
+    title_count_version.bump_on_commit()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_list(sender, **kwargs):
+    """Увеличивает версию кеша списка категорий после фиксации."""
+    transaction.on_commit(category_list_cache.bump)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def bump_genre_list(sender, **kwargs):
+    """Увеличивает версию кеша списка жанров после фиксации."""
+    transaction.on_commit(genre_list_cache.bump)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_list(sender, **kwargs):
+    """Увеличивает версию списка произведений после фиксации."""
+    title_list_version.bump_on_commit()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_review_list(sender, instance, **kwargs):
+    """Увеличивает версии отзывов произведения и списка произведений.
+
+    Отзыв меняет рейтинг в списке произведений. При удалении самого
+    произведения версии увеличивает его сигнал.
+    """
+    if is_title_deleting(instance.title_id):
+        return
+    review_list_version.bump_on_commit(instance.title_id)
+    title_list_version.bump_on_commit()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_list(sender, instance, **kwargs):
+    """Увеличивает версию комментариев отзыва после фиксации."""
+    if not is_review_deleting(instance.review_id):
+        comment_list_version.bump_on_commit(instance.review_id)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def bump_author_names(sender, instance, signal, created=False, **kwargs):
+    """Увеличивает версию имён авторов при смене имени или удалении."""
+    if signal is post_delete or (
+            not created and instance.username != getattr(
+                instance, '_saved_username', None)):
+        author_version.bump_on_commit()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def reset_user_snapshot(sender, instance, **kwargs):
+    """Сбрасывает снимок пользователя для аутентификации по JWT.
+
+    Повторный сброс после фиксации не даёт параллельному запросу
+    сохранить в кеш снимок, прочитанный до фиксации.
+    """
+    invalidate_user(instance.pk)
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def reset_user_tokens(sender, instance, signal, created=False, **kwargs):
+    """Убирает из кешей токены при удалении, деактивации и смене роли.
+
+    Повторное сохранение неактивного пользователя токены не трогает.
+    """
+    if signal is post_delete or not created and (
+            instance.role != getattr(instance, '_saved_role', None)
+            or not instance.is_active and getattr(
+                instance, '_saved_is_active', None) is not False):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def reset_review_exists(sender, instance, **kwargs):
+    """Сбрасывает проверку отзыва для комментариев, и после фиксации."""
+    if is_title_deleting(instance.title_id):
+        return
+    forget_review(instance.title_id, instance.pk)
+    transaction.on_commit(
+        lambda: forget_review(instance.title_id, instance.pk))
+
+
+@receiver(pre_delete, sender=Title)
+def reset_title_reviews_exist(sender, instance, **kwargs):
+    """Сбрасывает проверки всех отзывов удаляемого произведения."""
+    review_ids = list(instance.reviews.values_list('pk', flat=True))
+    forget_reviews(instance.pk, review_ids)
+    transaction.on_commit(lambda: forget_reviews(instance.pk, review_ids))
+
+
+# Кеши, которые сбрасываются после записи строк модели в обход ORM.
+# Версии отзывов и комментариев сбрасываются для всех родителей сразу.
+WRITTEN_ROWS_RESETS = {
+    CustomUser: (author_version.bump,),
+    Category: (category_list_cache.bump, title_list_version.bump,
+               title_count_version.bump),
+    Genre: (genre_list_cache.bump, title_list_version.bump,
+            title_count_version.bump),
+    Title: (title_list_version.bump, title_count_version.bump),
+    TitleGenre: (title_list_version.bump, title_count_version.bump),
+    Review: (review_list_version.bump, title_list_version.bump),
+    Comment: (comment_list_version.bump,),
+}
+
+
+@receiver(rows_written)
+def reset_written_rows(sender, truncated=False, **kwargs):
+    """Сбрасывает кеши API после загрузки CSV или очистки таблиц."""
+    for reset in WRITTEN_ROWS_RESETS.get(sender, ()):
+        transaction.on_commit(reset)
+    if truncated and sender is Review:
+        # Id отзывов после очистки используются заново.
+        transaction.on_commit(review_exists_version.bump)
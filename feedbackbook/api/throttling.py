@@ -0,0 +1,180 @@
+"""Ограничение частоты запросов к эндпоинтам аутентификации.
+
+Используется скользящее окно из двух фиксированных: число запросов в
+предыдущем окне берётся с весом оставшейся доли окна и складывается с
+числом запросов в текущем. Проверка читает два счётчика на ключ одним
+обращением к хранилищу и увеличивает один, обращений к БД нет.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import throttled
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Разбирает частоту вида `10/min` в пару (запросы, секунды)."""
+    if rate is None:
+        return None, None
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period[0]]
+
+
+class LocalCounterStore:
+    """Счётчики в памяти процесса, для тестов и одного процесса."""
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        counts = {}
+        with self._lock:
+            for key in keys:
+                value, expires = self._counters.get(key, (0, 0))
+                if expires > now:
+                    counts[key] = value
+        return counts
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            value, expires = self._counters.get(key, (0, 0))
+            if expires <= now:
+                value, expires = 0, now + timeout
+            self._counters[key] = value + 1, expires
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class CacheCounterStore:
+    """Счётчики в кеше Django, общие для процессов при общем бэкенде."""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def incr(self, key, timeout):
+        # add не перезаписывает счётчик, созданный другим процессом.
+        self.cache.add(key, 0, timeout)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, timeout)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_counter_store():
+    """Хранилище счётчиков из настройки THROTTLE_COUNTER_STORE."""
+    global _store
+    path = settings.THROTTLE_COUNTER_STORE
+    store = _store
+    if store is None or store[0] != path:
+        with _store_lock:
+            if _store is None or _store[0] != path:
+                _store = path, import_string(path)()
+            store = _store
+    return store[1]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Ограничение по IP и по полям запроса в скользящем окне.
+
+    Частоты берутся из DEFAULT_THROTTLE_RATES по ключам `<scope>` (для
+    IP) и `<scope>-identity` (для каждого из `identity_fields`).
+    Отклонённые запросы не увеличивают счётчики.
+    """
+
+    scope = None
+    identity_fields = ()
+    timer = time.time
+
+    def get_rate(self, name):
+        return parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(name))
+
+    def get_identities(self, request):
+        identities = [('ip', self.get_ident(request), self.scope)]
+        data = request.data
+        if hasattr(data, 'get'):
+            for field in self.identity_fields:
+                value = data.get(field)
+                if isinstance(value, str) and value:
+                    identities.append(
+                        (field, value.strip().lower(),
+                         f'{self.scope}-identity'))
+        return identities
+
+    def get_cache_key(self, kind, value, window, index):
+        digest = hashlib.md5(value.encode()).hexdigest()
+        return f'throttle:{self.scope}:{kind}:{digest}:{window}:{index}'
+
+    def allow_request(self, request, view):
+        now = self.timer()
+        checks = []
+        for kind, value, rate_name in self.get_identities(request):
+            limit, window = self.get_rate(rate_name)
+            if limit is None:
+                continue
+            index = int(now // window)
+            checks.append((
+                limit, window, now % window / window,
+                self.get_cache_key(kind, value, window, index - 1),
+                self.get_cache_key(kind, value, window, index)))
+        if not checks:
+            return True
+
+        store = get_counter_store()
+        counts = store.get_many(
+            [key for check in checks for key in check[3:]])
+        self.wait_seconds = 0
+        for limit, window, elapsed, previous_key, current_key in checks:
+            previous = counts.get(previous_key, 0)
+            current = counts.get(current_key, 0)
+            if previous * (1 - elapsed) + current >= limit:
+                self.wait_seconds = max(
+                    self.wait_seconds,
+                    self.get_wait(limit, window, elapsed, previous, current))
+        if self.wait_seconds:
+            throttled.inc(scope=self.scope)
+            return False
+        for limit, window, elapsed, previous_key, current_key in checks:
+            store.incr(current_key, 2 * window)
+        return True
+
+    @staticmethod
+    def get_wait(limit, window, elapsed, previous, current):
+        """Секунды, через которые оценка станет меньше предела."""
+        if current < limit:
+            return max((1 - (limit - current) / previous - elapsed)
+                       * window, 1)
+        # Текущее окно станет предыдущим и должно потерять вес.
+        return max((1 - elapsed + 1 - limit / current) * window, 1)
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None)
+
+
+class SignUpThrottle(SlidingWindowThrottle):
+    scope = 'signup'
+    identity_fields = ('username', 'email')
+
+
+class TokenThrottle(SlidingWindowThrottle):
+    scope = 'token'
+    identity_fields = ('username',)
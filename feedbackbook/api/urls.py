@@ -1,12 +1,16 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from .ingest import CommentIngester, ReviewIngester
 from .views import (signup,
+                    BulkIngestView,
+                    ExportView,
                     CategoryViewSet,
                     CommentViewSet,
                     GenreViewSet,
                     CustomTokenObtainPairView,
                     ReviewViewSet,
+                    SearchViewSet,
                     TitleViewSet,
                     UserViewSet,
                     )
@@ -27,10 +31,21 @@ router_v1.register(
 router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet, basename='comments')
+router_v1.register('search', SearchViewSet, basename='search')
 
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/signup/', signup, name='signup'),
     path('v1/auth/token/', CustomTokenObtainPairView.as_view(), name='token'),
+    path('v1/bulk/reviews/',
+         BulkIngestView.as_view(ingester_class=ReviewIngester),
+         name='bulk-reviews'),
+    path('v1/bulk/comments/',
+         BulkIngestView.as_view(ingester_class=CommentIngester),
+         name='bulk-comments'),
+    path('v1/export/reviews/', ExportView.as_view(kind='reviews'),
+         name='export-reviews'),
+    path('v1/export/comments/', ExportView.as_view(kind='comments'),
+         name='export-comments'),
 ]
@@ -1,18 +1,33 @@
 from django.conf import settings
-from django.db.models import Avg
-from django.core.mail import send_mail
+from django.db import IntegrityError, transaction
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.tokens import default_token_generator
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import (viewsets, filters, permissions, status)
+from rest_framework import (mixins, viewsets, filters, permissions, status)
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.views import APIView
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import AccessToken
 
-from reviews.models import CustomUser, Category, Genre, Title, Review
+from reviews.models import (CustomUser, Category, Comment, Genre,
+                            OutgoingEmail, Title)
+from reviews.search import SearchResults
+from core import metrics as core_metrics
+from core.routers import REPLICA, read_from
+from core.writes import run_write
+from . import export, metrics
+from .caches import (author_version, category_list_cache,
+                     comment_list_version, genre_list_cache,
+                     review_exists, review_list_version, title_list_version)
 from .filters import TitleFilter
-from .mixins import ListCreateDestroy
+from .ingest import NDJSONParser
+from .mixins import ConditionalGetMixin, ListCreateDestroy
+from .pagination import (CachedCountPagination, CommentPagination,
+                         OffsetOrCursorPagination)
 from .serializers import (CategorySerializer,
                           GenreSerializer,
                           TitleSerializer,
@@ -22,37 +37,64 @@ from .serializers import (CategorySerializer,
                           CustomTokenObtainPairSerializer,
                           UserSerializer,
                           ProfileSerializer,
+                          SearchResultSerializer,
                           TitlesCreateSerializer)
 from .permissions import (IsAdminOrReadOnlyPermission,
                           IsAuthorOrAdminPermission,
                           IsAdminPermission)
+from .throttling import SignUpThrottle, TokenThrottle
+
+
+def send_confirmation_code(user):
+    """Ставит письмо с кодом подтверждения в очередь."""
+    confirmation_code = default_token_generator.make_token(user)
+    OutgoingEmail.objects.create(
+        subject='YaMDb',
+        body=f'Ваш код подтверждения: {confirmation_code}',
+        from_email=settings.EMAIL_ADMIN,
+        recipient=user.email)
 
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([SignUpThrottle])
 def signup(request):
-    """Функция представления регистрации."""
+    """Функция представления регистрации.
+
+    Новый пользователь и письмо создаются в одной транзакции; гонку
+    параллельных регистраций разрешают уникальные ограничения.
+    """
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    username = serializer.validated_data['username']
-    email = serializer.validated_data['email']
-    user, _ = CustomUser.objects.get_or_create(
-        username=username, email=email)
+    if serializer.user is None:
+        try:
+            with transaction.atomic():
+                send_confirmation_code(CustomUser.objects.create(
+                    **serializer.validated_data))
+        except IntegrityError:
+            # Пользователя успели создать параллельным запросом:
+            # повторная проверка найдёт его или вернёт ошибку.
+            serializer = SignUpSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            send_confirmation_code(serializer.user)
+    else:
+        send_confirmation_code(serializer.user)
+    metrics.signups.inc()
+    return Response(serializer.data, status=status.HTTP_200_OK)
 
-    confirmation_code = default_token_generator.make_token(user)
 
-    send_mail(
-        subject='YaMDb',
-        message=f'Ваш код подтверждения: {confirmation_code}',
-        from_email=settings.EMAIL_ADMIN,
-        recipient_list=(email,))
-    return Response(serializer.data, status=status.HTTP_200_OK)
+def metrics_view(request):
+    """Функция представления метрик в формате Prometheus."""
+    with read_from(REPLICA):
+        body = core_metrics.render()
+    return HttpResponse(body, content_type=core_metrics.CONTENT_TYPE)
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Представление получения токена."""
 
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (TokenThrottle,)
 
     def post(self, request, * args, ** kwargs):
         serializer = CustomTokenObtainPairSerializer(data=request.data)
@@ -62,11 +104,13 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         user = get_object_or_404(CustomUser, username=username)
 
         if confirmation_code != user.confirmation_code:
+            metrics.tokens.inc(result='rejected')
             return Response(
                 serializer.errors,
                 status=status.HTTP_400_BAD_REQUEST)
 
         token = AccessToken.for_user(user)
+        metrics.tokens.inc(result='issued')
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
 
@@ -88,21 +132,27 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(permissions.IsAuthenticated,),
         serializer_class=ProfileSerializer)
     def set_profile(self, request, pk=None):
-        user = request.user
+        # request.user собран из снимка в кеше, профилю нужны все поля.
+        user = get_object_or_404(CustomUser, pk=request.user.pk)
         serializer = self.get_serializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        if request.method == 'PATCH':
+            serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Представление произведений."""
 
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).all()
+    queryset = (Title.objects.select_related('category')
+                .prefetch_related('genre'))
     http_method_names = ['get', 'post', 'patch', 'delete']
     permission_classes = (IsAdminOrReadOnlyPermission, )
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    pagination_class = CachedCountPagination
+    list_version = title_list_version
+    related_versions = (category_list_cache.version, genre_list_cache.version)
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH',):
@@ -115,6 +165,7 @@ class CategoryViewSet(ListCreateDestroy):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    list_cache = category_list_cache
 
 
 class GenreViewSet(ListCreateDestroy):
@@ -122,37 +173,138 @@ class GenreViewSet(ListCreateDestroy):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    list_cache = genre_list_cache
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Представление отзывов."""
 
     serializer_class = ReviewSerializer
     http_method_names = ['get', 'post', 'patch', 'delete']
     permission_classes = (IsAuthorOrAdminPermission, )
+    pagination_class = OffsetOrCursorPagination
+    list_version = review_list_version
+    related_versions = (author_version,)
 
     def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id'))
+        return self._title
+
+    def get_list_scope(self):
+        return self.get_title().pk
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        # Произведение не загружается: его наличие проверяет обновление
+        # рейтинга в Review.save.
+        try:
+            run_write(lambda: serializer.save(
+                author=self.request.user,
+                title_id=self.kwargs.get('title_id')))
+        except Title.DoesNotExist:
+            raise Http404
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Представление комментариев."""
 
     serializer_class = CommentSerializer
     http_method_names = ['get', 'post', 'patch', 'delete']
     permission_classes = (IsAuthorOrAdminPermission, )
-
-    def get_review(self):
-        return get_object_or_404(Review, pk=self.kwargs.get('review_id'))
+    pagination_class = CommentPagination
+    list_version = comment_list_version
+    related_versions = (author_version,)
+
+    def get_review_id(self):
+        """Id отзыва из адреса, если он относится к произведению."""
+        if not hasattr(self, '_review_id'):
+            review_id = self.kwargs.get('review_id')
+            if not review_exists(self.kwargs.get('title_id'), review_id):
+                raise Http404
+            self._review_id = int(review_id)
+        return self._review_id
+
+    def get_list_scope(self):
+        return self.get_review_id()
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return Comment.objects.filter(
+            review_id=self.get_review_id()).select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        review_id = self.get_review_id()
+        run_write(lambda: serializer.save(
+            author=self.request.user, review_id=review_id))
+
+
+class SearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Представление полнотекстового поиска по произведениям и отзывам."""
+
+    serializer_class = SearchResultSerializer
+    permission_classes = (permissions.AllowAny,)
+
+    def get_queryset(self):
+        return SearchResults(self.request.query_params.get('q'))
+
+
+class BulkIngestView(APIView):
+    """Представление пакетной загрузки строк NDJSON."""
+
+    permission_classes = (IsAdminPermission,)
+    parser_classes = (NDJSONParser,)
+    ingester_class = None
+
+    def post(self, request):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {'detail': 'Тело запроса должно содержать строки NDJSON.'},
+                status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.BULK_INGEST_MAX_ROWS:
+            return Response(
+                {'detail': 'В пачке должно быть не больше '
+                           f'{settings.BULK_INGEST_MAX_ROWS} строк.'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        results = self.ingester_class(rows).run()
+        created = sum(result['status'] == 'created' for result in results)
+        return Response({'created': created,
+                         'errors': len(results) - created,
+                         'results': results},
+                        status=status.HTTP_200_OK)
+
+
+class ExportView(APIView):
+    """Представление потоковой выгрузки в NDJSON или CSV.
+
+    Формат задаётся параметром `output` (`format` занят DRF), сжатие -
+    параметром `gzip=1`; фильтры: `title`, `category`, `date_from`,
+    `date_to`.
+    """
+
+    permission_classes = (IsAdminPermission,)
+    kind = None
+
+    def get(self, request):
+        params = request.query_params
+        output = params.get('output', export.NDJSON)
+        if output not in export.CONTENT_TYPES:
+            return Response(
+                {'output': [f'Допустимые форматы: '
+                            f'{", ".join(export.CONTENT_TYPES)}.']},
+                status=status.HTTP_400_BAD_REQUEST)
+        compress = params.get('gzip') == '1'
+        try:
+            chunks = export.stream(self.kind, params, output, compress)
+        except ValidationError as error:
+            return Response(error.message_dict,
+                            status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(
+            chunks, content_type=(export.GZIP_CONTENT_TYPE if compress
+                                  else export.CONTENT_TYPES[output]))
+        response['Content-Disposition'] = 'attachment; filename="{}"'.format(
+            export.get_filename(self.kind, output, compress))
+        return response
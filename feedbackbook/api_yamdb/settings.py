@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,6 +35,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -56,10 +59,70 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Профиль БД: dev - настройки SQLite по умолчанию; production - WAL,
+# ожидание блокировки, BEGIN IMMEDIATE и постоянные соединения для
+# нескольких процессов сервера.
+DB_PROFILE = os.getenv('DB_PROFILE', default='dev')
+SQLITE_PROFILES = {
+    'dev': {
+        'OPTIONS': {},
+        'CONN_MAX_AGE': 0,
+    },
+    'production': {
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', default=5000)),
+                'synchronous': 'NORMAL',
+                'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024)),
+            },
+        },
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=600)),
+    },
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        **SQLITE_PROFILES[DB_PROFILE],
+    }
+}
+
+# Реплика для чтения включается DB_REPLICA=1. DB_REPLICA_NAME - путь к
+# файлу реплики; по умолчанию это файл основной БД, открытый только для
+# чтения вторым соединением.
+if os.getenv('DB_REPLICA', default='') == '1':
+    REPLICA_PRAGMAS = {
+        name: value
+        for name, value in DATABASES['default']['OPTIONS'].get('pragmas', {}).items()
+        if name != 'journal_mode'}
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': 'file:{}?mode=ro'.format(
+            os.getenv('DB_REPLICA_NAME', default=DATABASES['default']['NAME'])),
+        'OPTIONS': {'pragmas': {**REPLICA_PRAGMAS, 'query_only': 1}},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+REPLICA_ROUTED_PREFIXES = ('/api/',)
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', default=5))
+
+# Запись отзывов и комментариев через очередь одного потока, который
+# объединяет их в короткие транзакции.
+WRITE_COALESCER_ENABLED = os.getenv('WRITE_COALESCER_ENABLED', default='') == '1'
+WRITE_COALESCER_MAX_BATCH = int(os.getenv('WRITE_COALESCER_MAX_BATCH', default=50))
+WRITE_COALESCER_MAX_DELAY_MS = float(os.getenv('WRITE_COALESCER_MAX_DELAY_MS', default=2))
+
+# Для нескольких процессов нужен общий бэкенд (например, memcached):
+# через него расходятся версии кешей справочников и счётчиков.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -102,8 +165,49 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticatedOrReadOnly', ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'api.authentication.CachedJWTAuthentication',
+    ),
+
+    # Частоты для IP и для имени или почты в запросе (`-identity`).
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': os.getenv('THROTTLE_SIGNUP_RATE', default='60/min'),
+        'signup-identity': os.getenv('THROTTLE_SIGNUP_IDENTITY_RATE', default='10/min'),
+        'token': os.getenv('THROTTLE_TOKEN_RATE', default='60/min'),
+        'token-identity': os.getenv('THROTTLE_TOKEN_IDENTITY_RATE', default='20/min'),
+    },
+}
+
+# Наибольшее число строк в одном запросе пакетной загрузки.
+BULK_INGEST_MAX_ROWS = int(os.getenv('BULK_INGEST_MAX_ROWS', default=1000))
+
+# Хранилище счётчиков ограничения частоты. CacheCounterStore общий для
+# процессов, если CACHE_BACKEND общий; LocalCounterStore - память процесса.
+THROTTLE_COUNTER_STORE = os.getenv(
+    'THROTTLE_COUNTER_STORE', default='api.throttling.CacheCounterStore')
+
+# Доля запросов, для которых считаются SQL-запросы и время сериализации
+# (заголовок Server-Timing и строка в логе core.timing).
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', default=1.0))
+
+# Каталог файлов метрик процессов, очищается при запуске сервиса.
+METRICS_DIR = os.getenv(
+    'METRICS_DIR',
+    default=os.path.join(tempfile.gettempdir(), 'yamdb-metrics'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_TIMING_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
 }
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
@@ -111,6 +215,9 @@ DEFAULT_FROM_EMAIL = 'admin@yamdb.com'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 EMAIL_ADMIN = os.getenv('EMAIL_ADMIN', default=DEFAULT_FROM_EMAIL)
 
+# Количество проверенных JWT, которые процесс хранит в памяти.
+JWT_TOKEN_CACHE_SIZE = int(os.getenv('JWT_TOKEN_CACHE_SIZE', default=10000))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=50),
 
@@ -0,0 +1,41 @@
+"""SQLite с настройками соединения для нескольких процессов.
+
+Дополнительные ключи OPTIONS:
+
+- `pragmas` - словарь PRAGMA, которые выполняются на каждом новом
+  соединении (journal_mode, busy_timeout, synchronous, mmap_size);
+- `transaction_mode` - режим BEGIN для транзакций. С IMMEDIATE
+  блокировка записи берётся в начале транзакции, и при конкуренции
+  соединение ждёт её busy_timeout, а не получает `database is locked`
+  при попытке повысить блокировку чтения.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = kwargs.pop('pragmas', {})
+        self.transaction_mode = kwargs.pop('transaction_mode', None)
+        if (self.transaction_mode is not None
+                and self.transaction_mode not in TRANSACTION_MODES):
+            raise ImproperlyConfigured(
+                f'Неизвестный transaction_mode: {self.transaction_mode}. '
+                f'Допустимые значения: {", ".join(TRANSACTION_MODES)}.')
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -14,3 +14,15 @@ USER_ROLES = (
     ('user', 'Пользователь'),
     ('moderator', 'Модератор'),
     ('admin', 'Админ'), )
+
+EMAIL_SUBJECT_MAX_LENGTH = 256
+EMAIL_STATUS_MAX_LENGTH = 16
+
+EMAIL_PENDING = 'pending'
+EMAIL_SENT = 'sent'
+EMAIL_FAILED = 'failed'
+
+EMAIL_STATUSES = (
+    ('pending', 'Ожидает отправки'),
+    ('sent', 'Отправлено'),
+    ('failed', 'Не отправлено'), )
@@ -0,0 +1,60 @@
+"""Замеры времени обработки запросов.
+
+Замеры текущего запроса хранятся в contextvar: обёртка выполнения SQL
+и сериализаторы добавляют в них время, только если запрос выбран для
+детального замера, иначе их накладные расходы сводятся к одной проверке.
+Задержки всех запросов по маршрутам пишутся в гистограмму Prometheus
+(core.metrics).
+"""
+import time
+from contextvars import ContextVar
+
+# Верхние границы корзин гистограммы в миллисекундах.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Замеры одного запроса."""
+
+    __slots__ = ('queries', 'db_ns', 'serializer_ns', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ns = 0
+        self.serializer_ns = 0
+        self.serializer_depth = 0
+
+
+def time_query(execute, sql, params, many, context):
+    """Обёртка connection.execute_wrapper: число и время SQL-запросов."""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter_ns()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_ns += time.perf_counter_ns() - started
+        timings.queries += 1
+
+
+class TimedSerializerMixin:
+    """Учитывает время to_representation в замерах запроса.
+
+    Вложенные сериализаторы не учитываются повторно: время считается
+    только на внешнем уровне.
+    """
+
+    def to_representation(self, instance):
+        timings = current_timings.get()
+        if timings is None or timings.serializer_depth:
+            return super().to_representation(instance)
+        timings.serializer_depth += 1
+        started = time.perf_counter_ns()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serializer_ns += time.perf_counter_ns() - started
+            timings.serializer_depth -= 1
@@ -0,0 +1,333 @@
+"""Метрики в формате Prometheus, общие для нескольких процессов.
+
+Каждый процесс пишет значения счётчиков и гистограмм в свой файл
+`<pid>.db` в каталоге METRICS_DIR, отображённый в память: обновление
+значения - это запись восьми байт без системных вызовов. При сборе
+метрик файлы всех процессов читаются и значения суммируются, поэтому
+один эндпоинт отдаёт данные всего хоста. Каталог нужно очищать при
+запуске сервиса, как и для multiprocess-режима prometheus_client.
+
+Показатели (gauge) пишутся в отдельный файл `live_<pid>.db` и, как в
+режиме livesum prometheus_client, суммируются только по работающим
+процессам: значение завершившегося воркера не завышает сумму. Хук
+завершения воркера может удалить его файл через mark_process_dead().
+
+Формат файла: 8 байт заголовка с длиной занятой части, затем записи
+`<длина ключа: int32><ключ в UTF-8, выровненный до 8 байт><double>`.
+"""
+import contextlib
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+from .instrumentation import LATENCY_BUCKETS_MS
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+INITIAL_SIZE = 64 * 1024
+HEADER = struct.Struct('q')
+KEY_LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+LIVE_PREFIX = 'live_'
+SECONDS_BUCKETS = tuple(value / 1000 for value in LATENCY_BUCKETS_MS)
+
+
+def entry_size(encoded_key):
+    size = KEY_LENGTH.size + len(encoded_key)
+    return size + (-size % 8) + VALUE.size
+
+
+def read_entries(data):
+    """Записи файла значений: пары (ключ, значение)."""
+    used = HEADER.unpack_from(data, 0)[0]
+    position = HEADER.size
+    while position < used:
+        length = KEY_LENGTH.unpack_from(data, position)[0]
+        key_start = position + KEY_LENGTH.size
+        key = bytes(data[key_start:key_start + length]).decode()
+        value_position = position + entry_size(key.encode()) - VALUE.size
+        yield key, value_position, VALUE.unpack_from(data, value_position)[0]
+        position = value_position + VALUE.size
+
+
+class MmapValues:
+    """Файл значений одного процесса, отображённый в память."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < INITIAL_SIZE:
+            self._file.truncate(INITIAL_SIZE)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        if HEADER.unpack_from(self._mmap, 0)[0] == 0:
+            HEADER.pack_into(self._mmap, 0, HEADER.size)
+        self._positions = {key: position for key, position, _
+                           in read_entries(self._mmap)}
+
+    def _add(self, key):
+        encoded = key.encode()
+        size = entry_size(encoded)
+        used = HEADER.unpack_from(self._mmap, 0)[0]
+        if used + size > len(self._mmap):
+            new_size = max(len(self._mmap) * 2, used + size)
+            self._mmap.close()
+            self._file.truncate(new_size)
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+        KEY_LENGTH.pack_into(self._mmap, used, len(encoded))
+        start = used + KEY_LENGTH.size
+        self._mmap[start:start + len(encoded)] = encoded
+        position = used + size - VALUE.size
+        VALUE.pack_into(self._mmap, position, 0.0)
+        # Длина занятой части пишется последней: читатели в других
+        # процессах не увидят недописанную запись.
+        HEADER.pack_into(self._mmap, 0, used + size)
+        self._positions[key] = position
+        return position
+
+    def increment(self, key, amount):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._add(key)
+            value = VALUE.unpack_from(self._mmap, position)[0]
+            VALUE.pack_into(self._mmap, position, value + amount)
+
+
+_stores = {}
+_store_lock = threading.Lock()
+
+
+def get_store(prefix=''):
+    """Файл значений текущего процесса, после fork создаётся заново."""
+    path = os.path.join(settings.METRICS_DIR, f'{prefix}{os.getpid()}.db')
+    store = _stores.get(prefix)
+    if store is None or store.path != path:
+        with _store_lock:
+            store = _stores.get(prefix)
+            if store is None or store.path != path:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                store = _stores[prefix] = MmapValues(path)
+    return store
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def mark_process_dead(pid):
+    """Удаляет показатели завершившегося процесса.
+
+    Вызывается из хука завершения воркера, например `child_exit` в
+    gunicorn. Счётчики процесса остаются в сумме.
+    """
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(
+            settings.METRICS_DIR, f'{LIVE_PREFIX}{pid}.db'))
+
+
+def collect_values():
+    """Суммы значений по ключам во всех файлах каталога.
+
+    Файлы показателей завершившихся процессов пропускаются.
+    """
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.db')):
+        name = os.path.basename(path)
+        if name.startswith(LIVE_PREFIX) and not is_process_alive(
+                int(name[len(LIVE_PREFIX):-len('.db')])):
+            continue
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < HEADER.size:
+            continue
+        for key, _, value in read_entries(data):
+            totals[key] += value
+    return totals
+
+
+class Metric:
+    """Базовый класс метрики с набором меток."""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        registry.append(self)
+
+    def key(self, sample, labels):
+        cache_key = (sample, tuple(labels.items()))
+        key = self._keys.get(cache_key)
+        if key is None:
+            key = self._keys[cache_key] = json.dumps(
+                [sample, dict(sorted(labels.items()))], ensure_ascii=False)
+        return key
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        get_store().increment(self.key(f'{self.name}_total', labels), amount)
+
+
+class Gauge(Metric):
+    """Показатель, который процессы изменяют на величину.
+
+    Значения работающих процессов суммируются, поэтому он подходит для
+    общих размеров и количеств, например числа записей в кешах процессов.
+    """
+
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        get_store(LIVE_PREFIX).increment(self.key(self.name, labels), amount)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=SECONDS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.bucket_labels = (*map(str, self.buckets), '+Inf')
+
+    def observe(self, value, **labels):
+        store = get_store()
+        index = len(self.buckets)
+        for bucket_index, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = bucket_index
+                break
+        # В файле хранятся некумулятивные корзины, при выводе они
+        # суммируются нарастающим итогом.
+        store.increment(self.key(
+            f'{self.name}_bucket',
+            {**labels, 'le': self.bucket_labels[index]}), 1)
+        store.increment(self.key(f'{self.name}_sum', labels), value)
+        store.increment(self.key(f'{self.name}_count', labels), 1)
+
+    def snapshot(self):
+        """Гистограммы всех процессов по наборам меток.
+
+        Возвращает {метки: {'count', 'sum', 'buckets'}}, корзины
+        накопительные, как в выводе для Prometheus.
+        """
+        result = {}
+        for sample, labels, value in histogram_samples(self, load_values()):
+            series = result.setdefault(tuple(sorted(
+                (name, label) for name, label in labels.items()
+                if name != 'le')), {'buckets': {}})
+            if sample.endswith('_bucket'):
+                series['buckets'][labels['le']] = value
+            else:
+                series[sample.rpartition('_')[2]] = value
+        return result
+
+
+registry = []
+collectors = []
+
+
+def register_collector(collector):
+    """Регистрирует функцию, вычисляющую метрики при сборе.
+
+    Функция получает собранные значения {(имя, метки): значение} и
+    возвращает список (имя, тип, описание, [(метки, значение)]).
+    """
+    collectors.append(collector)
+    return collector
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels.items())
+    return f'{{{pairs}}}'
+
+
+def format_value(value):
+    return repr(float(value)) if value % 1 else str(int(value))
+
+
+def render_metric(name, metric_type, documentation, samples):
+    lines = [f'# HELP {name} {documentation}', f'# TYPE {name} {metric_type}']
+    lines.extend(f'{sample}{format_labels(labels)} {format_value(value)}'
+                 for sample, labels, value in samples)
+    return lines
+
+
+def histogram_samples(metric, values):
+    series = defaultdict(dict)
+    for (sample, labels), value in values.items():
+        if sample == f'{metric.name}_bucket':
+            labels = dict(labels)
+            bound = labels.pop('le')
+            series[tuple(labels.items())][bound] = value
+    samples = []
+    for labels, buckets in sorted(series.items()):
+        labels = dict(labels)
+        total = 0
+        for bound in metric.bucket_labels:
+            total += buckets.get(bound, 0)
+            samples.append((f'{metric.name}_bucket',
+                            {**labels, 'le': bound}, total))
+        for suffix in ('sum', 'count'):
+            samples.append((
+                f'{metric.name}_{suffix}', labels,
+                values.get((f'{metric.name}_{suffix}',
+                            tuple(sorted(labels.items()))), 0)))
+    return samples
+
+
+def load_values():
+    """Собранные значения {(имя, метки): значение}."""
+    values = {}
+    for key, value in collect_values().items():
+        sample, labels = json.loads(key)
+        values[sample, tuple(sorted(labels.items()))] = value
+    return values
+
+
+def render():
+    """Текст всех метрик в формате Prometheus."""
+    values = load_values()
+    lines = []
+    for metric in registry:
+        if metric.type == 'histogram':
+            name, samples = metric.name, histogram_samples(metric, values)
+        else:
+            name = (f'{metric.name}_total' if metric.type == 'counter'
+                    else metric.name)
+            samples = [(sample, dict(labels), value)
+                       for (sample, labels), value in sorted(values.items())
+                       if sample == name]
+        lines.extend(render_metric(
+            name, metric.type, metric.documentation, samples))
+    for collector in collectors:
+        for name, metric_type, documentation, samples in collector(values):
+            lines.extend(render_metric(
+                name, metric_type, documentation,
+                [(name, labels, value) for labels, value in samples]))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,133 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .instrumentation import RequestTimings, current_timings, time_query
+from .metrics import Counter, Histogram
+from .routers import (RequestRead, current_read, get_request_user,
+                      replica_configured, stick_to_primary)
+
+logger = logging.getLogger('core.timing')
+
+UNMATCHED_ROUTE = 'unmatched'
+
+http_requests = Counter(
+    'yamdb_http_requests', 'Количество HTTP-запросов.',
+    ('route', 'action', 'method', 'status'))
+http_request_duration = Histogram(
+    'yamdb_http_request_duration_seconds', 'Время обработки запроса.',
+    ('route', 'action'))
+
+
+def get_route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNMATCHED_ROUTE
+
+
+class RequestTimingMiddleware:
+    """Замеры времени запроса, SQL-запросов и сериализации.
+
+    Время ответа каждого запроса попадает в гистограмму Prometheus по
+    маршруту и действию viewset.
+    Для доли запросов REQUEST_TIMING_SAMPLE_RATE дополнительно считаются
+    SQL-запросы и время сериализации: они отдаются в заголовке
+    Server-Timing и пишутся строкой JSON в лог core.timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Для viewset действие определяется по методу запроса.
+        actions = getattr(view_func, 'actions', None)
+        request.metrics_action = (
+            actions.get(request.method.lower(), '') if actions
+            else getattr(view_func, 'view_class', view_func).__name__)
+
+    def observe(self, request, response, total_ms):
+        route = get_route(request)
+        action = getattr(request, 'metrics_action', '')
+        http_request_duration.observe(
+            total_ms / 1000, route=route, action=action)
+        http_requests.inc(route=route, action=action, method=request.method,
+                          status=response.status_code)
+        return route
+
+    def __call__(self, request):
+        started = time.perf_counter_ns()
+        if random.random() >= self.sample_rate:
+            response = self.get_response(request)
+            self.observe(
+                request, response, (time.perf_counter_ns() - started) / 1e6)
+            return response
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(time_query))
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        total_ms = (time.perf_counter_ns() - started) / 1e6
+        route = self.observe(request, response, total_ms)
+
+        db_ms = timings.db_ns / 1e6
+        serializer_ms = timings.serializer_ns / 1e6
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.2f};desc="{timings.queries} queries", '
+            f'serializer;dur={serializer_ms:.2f}, '
+            f'total;dur={total_ms:.2f}')
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'route': route,
+                'method': request.method,
+                'status': response.status_code,
+                'queries': timings.queries,
+                'db_ms': round(db_ms, 2),
+                'serializer_ms': round(serializer_ms, 2),
+                'total_ms': round(total_ms, 2),
+            }))
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Чтение безопасных запросов к API с реплики.
+
+    Запросы GET, HEAD и OPTIONS к путям из REPLICA_ROUTED_PREFIXES
+    читают с реплики, остальные работают с основной БД. После успешного
+    изменения данных пользователь закрепляется за основной БД на
+    REPLICA_STICKY_SECONDS. Без настроенной реплики не подключается.
+    """
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefixes = tuple(settings.REPLICA_ROUTED_PREFIXES)
+
+    def __call__(self, request):
+        if request.method not in self.safe_methods:
+            response = self.get_response(request)
+            user = get_request_user(request)
+            if user is not None and response.status_code < 400:
+                stick_to_primary(user.pk)
+            return response
+        if not request.path.startswith(self.prefixes):
+            return self.get_response(request)
+        token = current_read.set(RequestRead(request))
+        try:
+            return self.get_response(request)
+        finally:
+            current_read.reset(token)
@@ -4,9 +4,10 @@ from .constants import CHARFIELD_MAX_LENGTH, SLUGFIELD_MAX_LENGTH
 
 
 class NameModel(models.Model):
-    """Абстрактная модель с общим полем name."""
+    """Абстрактная модель с общими полями: name, updated_at."""
 
     name = models.CharField('Название', max_length=CHARFIELD_MAX_LENGTH)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         abstract = True
@@ -24,13 +25,14 @@ class SlugModel(models.Model):
 
 
 class TextPubdateModel(models.Model):
-    """Абстрактная модель с общими полями: text, pub_date."""
+    """Абстрактная модель с общими полями: text, pub_date, updated_at."""
 
     text = models.TextField('Текст')
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
         db_index=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         abstract = True
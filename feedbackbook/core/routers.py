@@ -0,0 +1,102 @@
+"""Чтение с реплики и запись в основную БД.
+
+Соединение для чтения выбирается по переменной контекста: вне запроса и
+в запросах с изменением данных это основная БД, в безопасных запросах к
+API и в блоках `read_from(REPLICA)` - реплика. Пользователь, который
+недавно изменил данные, REPLICA_STICKY_SECONDS читает из основной БД и
+видит свои изменения, даже если реплика отстаёт.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+
+PRIMARY = DEFAULT_DB_ALIAS
+REPLICA = 'replica'
+STICKY_PREFIX = 'db-primary'
+
+# Имя соединения или объект с методом get_alias().
+current_read = ContextVar('current_read', default=None)
+
+
+def get_sticky_key(user_id):
+    return f'{STICKY_PREFIX}:{user_id}'
+
+
+def stick_to_primary(user_id):
+    cache.set(get_sticky_key(user_id), True,
+              settings.REPLICA_STICKY_SECONDS)
+
+
+def replica_configured():
+    return REPLICA in connections.databases
+
+
+def get_read_alias(alias=REPLICA):
+    """Соединение `alias`, если оно настроено, иначе основная БД."""
+    return alias if alias in connections.databases else PRIMARY
+
+
+@contextmanager
+def read_from(alias):
+    """Направляет чтение внутри блока в соединение `alias`."""
+    token = current_read.set(alias)
+    try:
+        yield
+    finally:
+        current_read.reset(token)
+
+
+def get_request_user(request):
+    """Пользователь запроса, если он уже определён аутентификацией.
+
+    Ленивый пользователь из сессии не вычисляется: его загрузка сама
+    обращается к БД и снова вызвала бы выбор соединения.
+    """
+    user = request.__dict__.get('user')
+    if user is None or isinstance(user, SimpleLazyObject):
+        return None
+    return user if user.is_authenticated else None
+
+
+class RequestRead:
+    """Выбор соединения для чтения в безопасном запросе."""
+
+    def __init__(self, request):
+        self.request = request
+        self._user_id = None
+        self._alias = REPLICA
+
+    def get_alias(self):
+        # Пользователь определяется аутентификацией DRF уже после начала
+        # запроса, решение принимается один раз для каждого пользователя.
+        user = get_request_user(self.request)
+        if user is not None and user.pk != self._user_id:
+            self._user_id = user.pk
+            self._alias = (PRIMARY if cache.get(get_sticky_key(user.pk))
+                           else REPLICA)
+        return self._alias
+
+
+class PrimaryReplicaRouter:
+    """Роутер: запись и миграции в основную БД, чтение по контексту."""
+
+    def db_for_read(self, model, **hints):
+        target = current_read.get()
+        if target is None or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return get_read_alias(
+            target if isinstance(target, str) else target.get_alias())
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика содержит те же данные, что и основная БД.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,9 @@
+import re
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_text(value):
+    """Приводит строку к виду для поиска: регистр, ё, пробелы."""
+    return WHITESPACE_PATTERN.sub(
+        ' ', value.casefold().replace('ё', 'е')).strip()
@@ -0,0 +1,112 @@
+"""Объединение небольших записей в короткие транзакции.
+
+SQLite допускает одного писателя: при множестве параллельных запросов
+каждый ждёт блокировку и фиксирует свою транзакцию отдельно. Очередь
+передаёт записи одному потоку, который выполняет их пачками в общей
+транзакции, поэтому на пачку приходится одна блокировка и одна
+фиксация.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+class WriteCoalescer:
+    """Поток, выполняющий записи пачками в одной транзакции.
+
+    Каждая запись выполняется в своей точке сохранения: ошибка одной
+    записи откатывает только её. Пачка закрывается по `max_batch`
+    записям или через `max_delay` секунд после первой записи. Результат
+    записи возвращается вызывающему после фиксации пачки. Функции
+    записи выполняются в другом потоке и не должны зависеть от
+    транзакции вызывающего.
+    """
+
+    def __init__(self, max_batch=50, max_delay=0.002, using=DEFAULT_DB_ALIAS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.using = using
+        self.batches = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func):
+        """Ставит запись в очередь и возвращает Future с её результатом."""
+        self._start()
+        future = Future()
+        self._queue.put((func, future))
+        return future
+
+    def run(self, func):
+        return self.submit(func).result()
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._work, name='write-coalescer', daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._collect()
+            try:
+                self.execute(batch)
+            finally:
+                connections[self.using].close_if_unusable_or_obsolete()
+
+    def execute(self, batch):
+        """Выполняет пачку и передаёт результаты в Future."""
+        results = []
+        try:
+            with transaction.atomic(using=self.using):
+                for func, future in batch:
+                    try:
+                        with transaction.atomic(using=self.using):
+                            results.append((future, func(), None))
+                    except Exception as error:
+                        results.append((future, None, error))
+        except Exception as error:
+            # Фиксация не удалась: не записана ни одна запись пачки.
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        finally:
+            self.batches += 1
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+write_coalescer = WriteCoalescer(
+    settings.WRITE_COALESCER_MAX_BATCH,
+    settings.WRITE_COALESCER_MAX_DELAY_MS / 1000)
+
+
+def run_write(func):
+    """Выполняет запись через очередь, если она включена."""
+    if settings.WRITE_COALESCER_ENABLED:
+        return write_coalescer.run(func)
+    return func()
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import Category, Genre, Title, Review, Comment, CustomUser
+from .models import (Category, Genre, Title, Review, Comment, CustomUser,
+                     OutgoingEmail)
 
 
 UserAdmin.fieldsets += (
@@ -71,4 +72,15 @@ class CommentAdmin(admin.ModelAdmin):
     readonly_fields = ['review', 'author']
 
 
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'status', 'attempts',
+                    'next_attempt_at', 'sent_at')
+    search_fields = ('recipient',)
+    list_filter = ('status',)
+    list_per_page = 10
+    readonly_fields = ['recipient', 'from_email', 'subject', 'body',
+                       'created_at', 'sent_at', 'last_error']
+
+
 admin.site.register(CustomUser, UserAdmin)
@@ -0,0 +1,179 @@
+"""Детерминированная генерация синтетического набора данных.
+
+Таблицы делятся на пачки по `chunk_size` строк, и каждая пачка строится
+своим генератором случайных чисел. Зерно генератора выводится из общего
+зерна, имени таблицы и номера пачки, поэтому результат не зависит от
+числа процессов. Модуль не обращается к БД, его функции выполняются в
+дочерних процессах.
+
+Отзыв с номером i относится к произведению `i % titles`, а его автор
+выбирается по номеру круга `i // titles` со сдвигом, своим для каждого
+произведения. Пока кругов не больше, чем пользователей, авторы отзывов
+на одно произведение различны и ограничение unique_author_title
+соблюдается без проверок.
+"""
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from core.constants import ADMIN, MAX_SCORE, MIN_SCORE, MODERATOR, USER
+
+USERS = 'users'
+CATEGORIES = 'category'
+GENRES = 'genre'
+TITLES = 'titles'
+GENRE_TITLES = 'genre_title'
+REVIEWS = 'review'
+COMMENTS = 'comments'
+
+COLUMNS = {
+    USERS: ('id', 'username', 'email', 'role', 'bio', 'first_name',
+            'last_name'),
+    CATEGORIES: ('id', 'name', 'slug'),
+    GENRES: ('id', 'name', 'slug'),
+    TITLES: ('id', 'name', 'year', 'description', 'category_id'),
+    GENRE_TITLES: ('id', 'title_id', 'genre_id'),
+    REVIEWS: ('id', 'title_id', 'text', 'author_id', 'score', 'pub_date'),
+    COMMENTS: ('id', 'review_id', 'text', 'author_id', 'pub_date'),
+}
+
+Scale = namedtuple('Scale', ('users', 'categories', 'genres', 'titles',
+                             'genres_per_title', 'reviews', 'comments'))
+
+WORDS = (
+    'фильм', 'книга', 'песня', 'сюжет', 'герой', 'финал', 'автор', 'режиссёр',
+    'музыка', 'история', 'время', 'город', 'дорога', 'море', 'ночь', 'зима',
+    'лето', 'звезда', 'тайна', 'мечта', 'память', 'свет', 'тень', 'голос',
+    'сердце', 'война', 'любовь', 'дружба', 'путь', 'мир', 'дом', 'сад',
+    'отличный', 'скучный', 'яркий', 'тёмный', 'долгий', 'смешной', 'грустный',
+    'неожиданный', 'красивый', 'странный', 'главный', 'последний', 'новый',
+    'очень', 'совсем', 'снова', 'всегда', 'никогда', 'почти', 'слишком',
+    'понравился', 'удивил', 'разочаровал', 'запомнился', 'затянут',
+    'рекомендую', 'пересмотрю', 'советую',
+)
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Алексей',
+               'Елена', 'Дмитрий', 'Наталья', 'Сергей')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов',
+              'Лебедев', 'Козлов', 'Новиков', 'Морозов', 'Волков')
+# Большинство оценок высокие, как в реальных каталогах.
+SCORE_WEIGHTS = (1, 1, 1, 2, 3, 5, 8, 10, 8, 6)
+MIN_YEAR = 1900
+MAX_YEAR = 2020
+DATES_START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+DATES_SPAN = int(timedelta(days=365 * 8).total_seconds())
+AUTHOR_STRIDE = 7919
+
+
+def words(rng, min_count, max_count):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(min_count, max_count)))
+
+
+def text(rng, sentences):
+    return ' '.join(f'{words(rng, 4, 12).capitalize()}.'
+                    for _ in range(rng.randint(1, sentences)))
+
+
+def date(rng):
+    moment = DATES_START + timedelta(
+        seconds=rng.randrange(DATES_SPAN), microseconds=rng.randrange(10**6))
+    return moment.isoformat().replace('+00:00', 'Z')
+
+
+def generate_users(rng, start, stop, scale):
+    rows = []
+    for pk in range(start + 1, stop + 1):
+        role = rng.choices((USER, MODERATOR, ADMIN), (980, 19, 1))[0]
+        rows.append((pk, f'user{pk}', f'user{pk}@yamdb.fake', role,
+                     text(rng, 2) if rng.random() < 0.3 else '',
+                     rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)))
+    return rows
+
+
+def generate_categories(rng, start, stop, scale):
+    return [(pk, f'Категория {pk}', f'category-{pk}')
+            for pk in range(start + 1, stop + 1)]
+
+
+def generate_genres(rng, start, stop, scale):
+    return [(pk, f'Жанр {pk}', f'genre-{pk}')
+            for pk in range(start + 1, stop + 1)]
+
+
+def generate_titles(rng, start, stop, scale):
+    return [(pk, words(rng, 1, 4).capitalize(),
+             rng.randint(MIN_YEAR, MAX_YEAR), text(rng, 3),
+             rng.randint(1, scale.categories) if scale.categories else '')
+            for pk in range(start + 1, stop + 1)]
+
+
+def generate_genre_titles(rng, start, stop, scale):
+    """Связи для произведений с номерами из [start, stop)."""
+    rows = []
+    limit = min(scale.genres_per_title, scale.genres)
+    for title_id in range(start + 1, stop + 1):
+        genres = rng.sample(range(1, scale.genres + 1),
+                            rng.randint(1, limit) if limit else 0)
+        for index, genre_id in enumerate(sorted(genres)):
+            rows.append(((title_id - 1) * limit + index + 1,
+                         title_id, genre_id))
+    return rows
+
+
+def review_author(index, scale):
+    title_index = index % scale.titles
+    return ((index // scale.titles + title_index * AUTHOR_STRIDE)
+            % scale.users + 1)
+
+
+def generate_reviews(rng, start, stop, scale):
+    scores = range(MIN_SCORE, MAX_SCORE + 1)
+    return [(index + 1, index % scale.titles + 1, text(rng, 4),
+             review_author(index, scale),
+             rng.choices(scores, SCORE_WEIGHTS)[0], date(rng))
+            for index in range(start, stop)]
+
+
+def generate_comments(rng, start, stop, scale):
+    return [(pk, rng.randint(1, scale.reviews), text(rng, 2),
+             rng.randint(1, scale.users), date(rng))
+            for pk in range(start + 1, stop + 1)]
+
+
+GENERATORS = {
+    USERS: (generate_users, 'users'),
+    CATEGORIES: (generate_categories, 'categories'),
+    GENRES: (generate_genres, 'genres'),
+    TITLES: (generate_titles, 'titles'),
+    GENRE_TITLES: (generate_genre_titles, 'titles'),
+    REVIEWS: (generate_reviews, 'reviews'),
+    COMMENTS: (generate_comments, 'comments'),
+}
+
+
+def validate(scale):
+    """Возвращает текст ошибки, если масштаб несовместим с моделями."""
+    if any(value < 0 for value in scale):
+        return 'Размеры таблиц не могут быть отрицательными.'
+    if scale.reviews > scale.users * scale.titles:
+        return ('Отзывов не может быть больше, чем пар пользователь - '
+                'произведение.')
+    if scale.comments and not (scale.reviews and scale.users):
+        return 'Для комментариев нужны отзывы и пользователи.'
+    return None
+
+
+def plan(scale, chunk_size, seed):
+    """Задания на генерацию пачек в порядке загрузки таблиц."""
+    for table, (_, size_field) in GENERATORS.items():
+        total = getattr(scale, size_field)
+        for index, start in enumerate(range(0, total, chunk_size)):
+            yield seed, scale, table, index, start, min(
+                start + chunk_size, total)
+
+
+def generate_chunk(task):
+    """Строит пачку строк таблицы, возвращает (таблица, строки)."""
+    seed, scale, table, index, start, stop = task
+    rng = random.Random(f'{seed}:{table}:{index}')
+    generator, _ = GENERATORS[table]
+    return table, generator(rng, start, stop, scale)
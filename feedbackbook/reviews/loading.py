@@ -0,0 +1,212 @@
+"""Потоковая загрузка CSV в БД пачками.
+
+Строки читаются по одной, собираются в пачки по `chunk_size` и
+записываются одним executemany в отдельной транзакции, поэтому память
+не зависит от размера файла, а модели ORM при вставке не создаются.
+Связи произведений и жанров загружаются напрямую в таблицу TitleGenre.
+Даты из файла сохраняются как есть, хотя поля объявлены с auto_now_add
+и auto_now. Режим upsert работает через ORM и заметно медленнее.
+
+Сигналы моделей при загрузке не отправляются, поэтому после записи
+строк модели отправляется сигнал rows_written, по которому сбрасываются
+кеши API.
+"""
+import contextlib
+import csv
+import time
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import (DEFAULT_DB_ALIAS, connection, connections,
+                       transaction)
+from django.dispatch import Signal
+from django.utils import timezone
+
+from core.utils import normalize_text
+from . import search
+from .models import (Category, Comment, CustomUser, Genre, Review, Title,
+                     TitleGenre)
+
+MODELS_CSVFILES = {CustomUser: 'users.csv',
+                   Category: 'category.csv',
+                   Genre: 'genre.csv',
+                   Title: 'titles.csv',
+                   TitleGenre: 'genre_title.csv',
+                   Review: 'review.csv',
+                   Comment: 'comments.csv'}
+# Строки модели записаны или удалены в обход ORM. Аргумент truncated
+# означает, что таблица была очищена.
+rows_written = Signal()
+
+
+def prepare_title(values):
+    values['name_normalized'] = normalize_text(values['name'])
+
+
+PREPARERS = {Title: prepare_title}
+DERIVED_FIELDS = {Title: ('name_normalized',)}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextlib.contextmanager
+def keep_dates(model, columns):
+    """Отключает auto_now и auto_now_add у полей, заданных в файле."""
+    fields = [field for field in model._meta.concrete_fields
+              if field.attname in columns
+              and (getattr(field, 'auto_now', False)
+                   or getattr(field, 'auto_now_add', False))]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class RowConverter:
+    """Преобразует строку CSV в значения полей модели по attname."""
+
+    def __init__(self, model, columns):
+        self.fields = [(column, model._meta.get_field(column))
+                       for column in columns]
+        self.prepare = PREPARERS.get(model)
+
+    def __call__(self, row):
+        values = {}
+        for column, field in self.fields:
+            value = row[column]
+            if value == '' and field.null:
+                value = None
+            elif value != '':
+                value = field.to_python(value)
+            values[field.attname] = value
+        if self.prepare:
+            self.prepare(values)
+        return values
+
+
+class RowInserter:
+    """Вставляет пачку значений одним executemany в обход ORM.
+
+    Поля, которых нет в файле, получают значение по умолчанию, а поля
+    с auto_now и auto_now_add - время начала пачки.
+    """
+
+    def __init__(self, model, attnames):
+        self.model = model
+        self.fields = [field for field in model._meta.concrete_fields
+                       if field.attname in attnames or not field.primary_key]
+        self.attnames = attnames
+        quote = connection.ops.quote_name
+        self.sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in self.fields),
+            ', '.join(['%s'] * len(self.fields)))
+
+    def defaults(self, db):
+        now = timezone.now()
+        return {field.attname: field.get_db_prep_save(
+            now if getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False)
+            else field.get_default(), db)
+            for field in self.fields if field.attname not in self.attnames}
+
+    def __call__(self, chunk):
+        # Прокси django.db.connection на каждое обращение ищет соединение
+        # потока, поэтому в цикле используется само соединение.
+        db = connections[DEFAULT_DB_ALIAS]
+        defaults = self.defaults(db)
+        params = [
+            [defaults[field.attname] if field.attname in defaults
+             else field.get_db_prep_save(values[field.attname], db)
+             for field in self.fields]
+            for values in chunk]
+        with db.cursor() as cursor:
+            cursor.executemany(self.sql, params)
+
+
+def get_update_fields(model, columns):
+    """Поля, обновляемые при upsert: колонки файла и вычисляемые поля."""
+    return [field for field in model._meta.concrete_fields
+            if not field.primary_key
+            and (field.attname in columns
+                 or field.name in DERIVED_FIELDS.get(model, ())
+                 or getattr(field, 'auto_now', False))]
+
+
+def upsert_chunk(model, objs, update_fields):
+    """Обновляет существующие по id записи пачки и создаёт остальные."""
+    existing = set(model.objects.filter(
+        pk__in=[obj.pk for obj in objs]).values_list('pk', flat=True))
+    updated = [obj for obj in objs if obj.pk in existing]
+    if updated:
+        for obj in updated:
+            for field in update_fields:
+                setattr(obj, field.attname, field.pre_save(obj, False))
+        model.objects.bulk_update(
+            updated, [field.name for field in update_fields])
+    model.objects.bulk_create(
+        [obj for obj in objs if obj.pk not in existing])
+
+
+def load_rows(model, rows, columns, chunk_size, upsert=False):
+    """Загружает итерируемые строки-словари, возвращает их количество.
+
+    Каждая пачка записывается в отдельной транзакции.
+    """
+    convert = RowConverter(model, columns)
+    attnames = {field.attname for _, field in convert.fields}
+    attnames.update(DERIVED_FIELDS.get(model, ()))
+    insert = RowInserter(model, attnames)
+    update_fields = get_update_fields(model, columns)
+    total = 0
+    with keep_dates(model, columns):
+        for chunk in chunked(rows, chunk_size):
+            values = [convert(row) for row in chunk]
+            with transaction.atomic():
+                if upsert:
+                    upsert_chunk(model, [model(**item) for item in values],
+                                 update_fields)
+                else:
+                    insert(values)
+            total += len(chunk)
+    rows_written.send(sender=model)
+    return total
+
+
+def load_file(model, path, chunk_size, upsert=False):
+    """Загружает CSV-файл модели, возвращает (строк, секунд)."""
+    started = time.monotonic()
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        rows = csv.DictReader(file)
+        total = load_rows(model, rows, rows.fieldnames, chunk_size, upsert)
+    return total, time.monotonic() - started
+
+
+def truncate(models):
+    """Очищает таблицы моделей и ссылающиеся на них таблицы."""
+    models = list(models)
+    tables = [model._meta.db_table for model in models]
+    sql_list = connection.ops.sql_flush(
+        no_style(), tables, allow_cascade=True)
+    connection.ops.execute_sql_flush(sql_list)
+    for model in models:
+        rows_written.send(sender=model, truncated=True)
+
+
+def refresh_aggregates():
+    """Пересчитывает рейтинги и поисковый индекс после загрузки."""
+    with transaction.atomic():
+        Title.objects.recalculate_rating()
+        search.rebuild()
+        rows_written.send(sender=Title)
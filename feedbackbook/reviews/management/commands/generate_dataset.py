@@ -0,0 +1,147 @@
+"""Команда генерации синтетических данных: python manage.py generate_dataset.
+"""
+import csv
+import os
+import time
+from collections import deque
+from multiprocessing import Pool
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+
+from reviews import dataset, loading
+
+MODELS = {csv_file[:-len('.csv')]: model
+          for model, csv_file in loading.MODELS_CSVFILES.items()}
+PENDING_PER_WORKER = 2
+
+
+class Command(BaseCommand):
+    """Класс генерации данных для нагрузочного тестирования.
+
+    Пачки строятся в нескольких процессах, а записываются по порядку в
+    главном процессе: в CSV файлы формата load_csv или сразу в БД.
+    Генерация опережает запись не больше чем на `--max-pending` пачек,
+    поэтому при медленной записи пачки не копятся в памяти.
+    """
+
+    def add_arguments(self, parser):
+        for name, default in zip(
+                dataset.Scale._fields, (1000, 10, 20, 1000, 3, 20000, 5000)):
+            parser.add_argument(
+                f'--{name.replace("_", "-")}', type=int, default=default,
+                help=f'Размер генерируемых данных ({name}).')
+        parser.add_argument(
+            '--seed', default='yamdb',
+            help='Зерно генератора: одинаковое зерно даёт одинаковые данные.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Количество строк в одной пачке.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Количество процессов генерации.')
+        parser.add_argument(
+            '--max-pending', type=int,
+            help='Наибольшее число сгенерированных, но не записанных '
+                 f'пачек. По умолчанию {PENDING_PER_WORKER} на процесс.')
+        parser.add_argument(
+            '--output',
+            help='Каталог для CSV файлов. Без него данные пишутся в БД.')
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='Очистить таблицы перед записью в БД.')
+
+    def handle(self, *args, **options):
+        scale = dataset.Scale(*(options[name]
+                                for name in dataset.Scale._fields))
+        error = dataset.validate(scale)
+        if error:
+            raise CommandError(error)
+        max_pending = (options['max_pending']
+                       or options['workers'] * PENDING_PER_WORKER)
+        if min(options['chunk_size'], options['workers'], max_pending) < 1:
+            raise CommandError(
+                'Размер пачки, число процессов и число ожидающих пачек '
+                'должны быть больше нуля.')
+        tasks = dataset.plan(scale, options['chunk_size'], options['seed'])
+        if options['output']:
+            os.makedirs(options['output'], exist_ok=True)
+            write = self.csv_writer(options['output'])
+        else:
+            if options['truncate']:
+                loading.truncate(reversed(list(MODELS.values())))
+            write = self.db_writer(options['chunk_size'])
+        if options['workers'] == 1:
+            self.consume(map(dataset.generate_chunk, tasks), write)
+        else:
+            # Дочерним процессам не нужны открытые соединения с БД.
+            connections.close_all()
+            with Pool(options['workers']) as pool:
+                self.consume(self.generate(pool, tasks, max_pending), write)
+        write(None, None)
+        if not options['output']:
+            loading.refresh_aggregates()
+            self.stdout.write(self.style.SUCCESS(
+                'Рейтинги произведений и поисковый индекс обновлены'))
+
+    @staticmethod
+    def generate(pool, tasks, max_pending):
+        """Пачки по порядку, не больше `max_pending` в работе и в очереди.
+
+        Следующая задача отправляется в пул только после того, как
+        главный процесс забрал готовую пачку для записи.
+        """
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(dataset.generate_chunk, (task,)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def consume(self, chunks, write):
+        table, total, started = None, 0, time.monotonic()
+        for chunk_table, rows in chunks:
+            if chunk_table != table:
+                self.report(table, total, started)
+                table, total, started = chunk_table, 0, time.monotonic()
+            write(chunk_table, rows)
+            total += len(rows)
+        self.report(table, total, started)
+
+    def report(self, table, total, started):
+        if table is None:
+            return
+        seconds = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Таблица {table}: {total} строк за {seconds:.2f} с '
+            f'({total / max(seconds, 1e-6):.0f} строк/с)'))
+
+    def csv_writer(self, path):
+        files = {}
+
+        def write(table, rows):
+            if table is None:
+                for file, _ in files.values():
+                    file.close()
+                return
+            if table not in files:
+                file = open(os.path.join(path, f'{table}.csv'), 'w',
+                            encoding='utf-8', newline='')
+                writer = csv.writer(file)
+                writer.writerow(dataset.COLUMNS[table])
+                files[table] = file, writer
+            files[table][1].writerows(rows)
+
+        return write
+
+    def db_writer(self, chunk_size):
+        def write(table, rows):
+            if table is None:
+                return
+            columns = dataset.COLUMNS[table]
+            loading.load_rows(
+                MODELS[table], (dict(zip(columns, row)) for row in rows),
+                columns, chunk_size)
+
+        return write
@@ -1,51 +1,56 @@
 """Команда загрузки CSV файлов в БД: python manage.py load_csv."""
-import csv
+import os
 
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 from django.db.utils import IntegrityError
 
-from reviews.models import (CustomUser,
-                            Title,
-                            Category,
-                            Genre,
-                            Review,
-                            Comment
-                            )
-
-
-MODELS_CSVFILES = {CustomUser: 'users.csv',
-                   Category: 'category.csv',
-                   Genre: 'genre.csv',
-                   Title: 'titles.csv',
-                   Review: 'review.csv',
-                   Comment: 'comments.csv'}
+from reviews import loading
 
 
 class Command(BaseCommand):
-    """Класс загрузки CSV файлов в БД."""
+    """Класс потоковой загрузки CSV файлов в БД пачками."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.STATICFILES_DIRS[0], 'data'),
+            help='Каталог с CSV файлами.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Количество строк, записываемых в одной транзакции.')
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            '--truncate', action='store_true',
+            help='Очистить таблицы перед загрузкой.')
+        mode.add_argument(
+            '--upsert', action='store_true',
+            help='Обновлять уже существующие записи по id.')
 
-    def handle(self, *args, **kwargs):
-        for model, csv_file in MODELS_CSVFILES.items():
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        files = {model: os.path.join(options['path'], csv_file)
+                 for model, csv_file in loading.MODELS_CSVFILES.items()}
+        if options['truncate']:
+            loading.truncate(reversed(list(files)))
+            self.stdout.write(self.style.SUCCESS('Таблицы очищены'))
+        for model, path in files.items():
+            if not os.path.exists(path):
+                self.stdout.write(self.style.WARNING(
+                    f'Файл {path} не найден, модель {model.__name__} '
+                    'пропущена'))
+                continue
             try:
-                with open(f'{settings.STATICFILES_DIRS[0]}/data/{csv_file}',
-                          'r', encoding='utf-8') as file:
-                    rows = csv.DictReader(file)
-                    model.objects.bulk_create(model(**row) for row in rows)
-                    self.stdout.write(self.style.SUCCESS(
-                        f'Данные модели {model.__name__} загружены'))
+                rows, seconds = loading.load_file(
+                    model, path, options['chunk_size'], options['upsert'])
             except IntegrityError as error:
-                self.stdout.write(self.style.ERROR(
-                    f'Ошибка загрузки модели {model.__name__} - {error}'))
-            except Exception as error:
-                self.stdout.write(self.style.ERROR(f'Ошибка {error}'))
-        try:
-            with open('static/data/genre_title.csv', 'r') as csv_file:
-                rows = csv.DictReader(csv_file)
-                for row in rows:
-                    Title(pk=row['title_id']).genre.add(
-                        Genre(pk=row['genre_id']))
-                self.stdout.write(self.style.SUCCESS(
-                    'Данные модели TitleGenre загружены'))
-        except Exception as error:
-            self.stdout.write(self.style.ERROR(f'Ошибка {error}'))
+                raise CommandError(
+                    f'Ошибка загрузки модели {model.__name__} - {error}')
+            self.stdout.write(self.style.SUCCESS(
+                f'Данные модели {model.__name__} загружены: {rows} строк '
+                f'за {seconds:.2f} с ({rows / max(seconds, 1e-6):.0f} '
+                'строк/с)'))
+        loading.refresh_aggregates()
+        self.stdout.write(self.style.SUCCESS(
+            'Рейтинги произведений и поисковый индекс обновлены'))
@@ -0,0 +1,18 @@
+"""Команда перестроения индекса: python manage.py rebuild_search_index."""
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from reviews import search
+
+
+class Command(BaseCommand):
+    """Класс перестроения полнотекстового индекса произведений и отзывов."""
+
+    def handle(self, *args, **kwargs):
+        if not search.is_supported():
+            self.stdout.write(self.style.ERROR(
+                'Полнотекстовый поиск доступен только для SQLite'))
+            return
+        with transaction.atomic():
+            search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
@@ -0,0 +1,15 @@
+"""Команда пересчёта рейтингов: python manage.py recalculate_ratings."""
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Класс пересчёта рейтингов произведений по таблице отзывов."""
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            updated = Title.objects.recalculate_rating()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинги пересчитаны для {updated} произведений'))
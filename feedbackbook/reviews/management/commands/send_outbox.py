@@ -0,0 +1,111 @@
+"""Команда отправки очереди писем: python manage.py send_outbox."""
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.constants import EMAIL_FAILED, EMAIL_PENDING, EMAIL_SENT
+from reviews.models import OutgoingEmail
+
+UPDATED_FIELDS = ('status', 'attempts', 'next_attempt_at', 'last_error',
+                  'sent_at')
+
+
+class Command(BaseCommand):
+    """Класс отправки писем из очереди через одно соединение.
+
+    Письма забираются пачками: у забранных писем следующая попытка
+    сдвигается на время аренды, поэтому после падения обработчика они
+    вернутся в очередь. Неудачная отправка повторяется с экспоненциальной
+    задержкой, после исчерпания попыток письмо помечается как failed.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Количество писем, забираемых за один раз.')
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Число попыток, после которого письмо не отправляется.')
+        parser.add_argument(
+            '--backoff', type=float, default=30,
+            help='Базовая задержка повтора в секундах.')
+        parser.add_argument(
+            '--lease', type=float, default=300,
+            help='Сколько секунд забранное письмо скрыто от других '
+                 'обработчиков.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, ожидая новые письма.')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками пустой очереди в секундах.')
+
+    def claim_batch(self, batch_size, lease):
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=EMAIL_PENDING, next_attempt_at__lte=now)
+                .order_by('next_attempt_at')[:batch_size])
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in batch]
+            ).update(next_attempt_at=now + timedelta(seconds=lease))
+        return batch
+
+    def fail(self, email, error, max_attempts, backoff):
+        email.last_error = str(error)
+        if email.attempts >= max_attempts:
+            email.status = EMAIL_FAILED
+        else:
+            email.next_attempt_at = timezone.now() + timedelta(
+                seconds=backoff * 2 ** (email.attempts - 1))
+
+    def deliver(self, connection, batch, max_attempts, backoff):
+        sent = 0
+        for email in batch:
+            email.attempts += 1
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=(email.recipient,),
+                connection=connection)
+            try:
+                connection.open()
+                message.send()
+            except Exception as error:
+                connection.close()
+                self.fail(email, error, max_attempts, backoff)
+            else:
+                email.status = EMAIL_SENT
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent += 1
+        OutgoingEmail.objects.bulk_update(batch, UPDATED_FIELDS)
+        return sent
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        try:
+            while True:
+                batch = self.claim_batch(
+                    options['batch_size'], options['lease'])
+                if batch:
+                    started = time.monotonic()
+                    sent = self.deliver(
+                        connection, batch,
+                        options['max_attempts'], options['backoff'])
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Отправлено писем: {sent} из {len(batch)} за '
+                        f'{time.monotonic() - started:.2f} с'))
+                    continue
+                if not options['loop']:
+                    break
+                connection.close()
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
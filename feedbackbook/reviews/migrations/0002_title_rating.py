@@ -0,0 +1,58 @@
+# Generated by Django 3.2 on 2026-10-18 08:43
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+
+def fill_title_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = (Review.objects.filter(title=OuterRef('pk'))
+               .order_by().values('title'))
+    Title.objects.update(
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')), 0),
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')), 0))
+    Title.objects.update(rating=Case(
+        When(reviews_count=0, then=None),
+        default=F('score_sum') / F('reviews_count'),
+        output_field=models.PositiveSmallIntegerField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='score',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1, 'Минимум  1'), django.core.validators.MaxValueValidator(10, 'Максимум 10')], verbose_name='Оценка произведения'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='genre',
+            field=models.ManyToManyField(to='reviews.Genre'),
+        ),
+        migrations.RunPython(fill_title_rating, migrations.RunPython.noop),
+    ]
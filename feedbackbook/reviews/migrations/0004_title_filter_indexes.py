@@ -0,0 +1,69 @@
+# Generated by Django 3.2 on 2026-10-18 08:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core.utils import normalize_text
+
+
+def fill_name_normalized(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    titles = []
+    for title in Title.objects.only('pk', 'name').iterator():
+        title.name_normalized = normalize_text(title.name)
+        titles.append(title)
+    Title.objects.bulk_update(titles, ('name_normalized',), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_pub_date_keyset_indexes'),
+    ]
+
+    operations = [
+        # Таблица reviews_title_genre уже создана для автоматической связи,
+        # поэтому модель TitleGenre добавляется только в состояние.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='TitleGenre',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('genre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reviews.genre', verbose_name='Жанр')),
+                        ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reviews.title', verbose_name='Произведение')),
+                    ],
+                    options={
+                        'verbose_name': 'жанр произведения',
+                        'verbose_name_plural': 'Жанры произведений',
+                        'db_table': 'reviews_title_genre',
+                        'unique_together': {('title', 'genre')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='genre',
+                    field=models.ManyToManyField(through='reviews.TitleGenre', to='reviews.Genre'),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='titlegenre',
+            index=models.Index(fields=['genre', 'title'], name='title_genre_genre_idx'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='name_normalized',
+            field=models.CharField(default='', editable=False, max_length=256, verbose_name='Нормализованное название'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_name_normalized, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year'], name='title_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name_normalized'], name='title_name_normalized_idx'),
+        ),
+    ]
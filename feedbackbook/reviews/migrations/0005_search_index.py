@@ -0,0 +1,41 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    'CREATE VIRTUAL TABLE reviews_search USING fts5('
+    'name, body, kind UNINDEXED, object_id UNINDEXED, title_id UNINDEXED, '
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+FOLD_YO_SQL = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+FILL_SQL = (
+    'INSERT INTO reviews_search (rowid, name, body, kind, object_id, '
+    f"title_id) SELECT id * 2, {FOLD_YO_SQL.format('name')}, "
+    f"{FOLD_YO_SQL.format('description')}, 'title', id, id "
+    'FROM reviews_title',
+    'INSERT INTO reviews_search (rowid, name, body, kind, object_id, '
+    f"title_id) SELECT id * 2 + 1, '', {FOLD_YO_SQL.format('text')}, "
+    "'review', id, title_id FROM reviews_review",
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    for sql in FILL_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS reviews_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,17 +1,26 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 from core.models import NameModel, SlugModel, TextPubdateModel
+from core.utils import normalize_text
 from core.validators import year_validator
 from core.constants import (MIN_SCORE,
                             MAX_SCORE,
+                            CHARFIELD_MAX_LENGTH,
                             USER_CHARFIELD_MAX_LENGTH,
                             EMAILFIELD_MAX_LENGTH,
                             USER_ROLES,
                             USER,
                             MODERATOR,
-                            ADMIN)
+                            ADMIN,
+                            EMAIL_SUBJECT_MAX_LENGTH,
+                            EMAIL_STATUS_MAX_LENGTH,
+                            EMAIL_STATUSES,
+                            EMAIL_PENDING)
 
 
 class CustomUser(AbstractUser):
@@ -53,6 +62,8 @@ class CustomUser(AbstractUser):
         'Код подтверждения',
         max_length=USER_CHARFIELD_MAX_LENGTH)
 
+    SAVED_FIELDS = ('username', 'role', 'is_active')
+
     class Meta:
         verbose_name = 'пользователь'
         verbose_name_plural = 'Пользователи'
@@ -76,6 +87,21 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_saved()
+        return instance
+
+    def remember_saved(self):
+        """Запоминает значения полей, смену которых проверяют сигналы."""
+        for name in self.SAVED_FIELDS:
+            setattr(self, f'_saved_{name}', self.__dict__.get(name))
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.remember_saved()
+
 
 class Category(NameModel, SlugModel):
     """Модель категорий."""
@@ -99,6 +125,48 @@ class Genre(NameModel, SlugModel):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    """Набор произведений с операциями над агрегатами оценок."""
+
+    def apply_review_delta(self, count_delta, score_delta):
+        """Сдвигает счётчик отзывов и сумму оценок одним UPDATE."""
+        reviews_count = F('reviews_count') + count_delta
+        score_sum = F('score_sum') + score_delta
+        return self.update(
+            reviews_count=reviews_count,
+            score_sum=score_sum,
+            updated_at=timezone.now(),
+            rating=Case(
+                When(reviews_count=-count_delta, then=None),
+                default=score_sum / reviews_count,
+                output_field=models.PositiveSmallIntegerField()))
+
+    def recalculate_rating(self):
+        """Пересчитывает агрегаты оценок по таблице отзывов."""
+        reviews = (Review.objects.filter(title=OuterRef('pk'))
+                   .order_by().values('title'))
+        self.update(
+            reviews_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk'))
+                         .values('total')), 0),
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score'))
+                         .values('total')), 0))
+        return self.update(updated_at=timezone.now(), rating=Case(
+            When(reviews_count=0, then=None),
+            default=F('score_sum') / F('reviews_count'),
+            output_field=models.PositiveSmallIntegerField()))
+
+    def refresh_name_normalized(self, batch_size=1000):
+        """Заполняет нормализованные названия после массовой загрузки."""
+        titles = []
+        for title in self.only('pk', 'name').iterator(chunk_size=batch_size):
+            title.name_normalized = normalize_text(title.name)
+            titles.append(title)
+        self.model.objects.bulk_update(
+            titles, ('name_normalized',), batch_size=batch_size)
+
+
 class Title(NameModel):
     """Модель произведений."""
 
@@ -113,16 +181,67 @@ class Title(NameModel):
         verbose_name='Категория',
         null=True,
         blank=True)
-    genre = models.ManyToManyField(Genre)
+    genre = models.ManyToManyField(Genre, through='TitleGenre')
+    name_normalized = models.CharField(
+        'Нормализованное название',
+        max_length=CHARFIELD_MAX_LENGTH,
+        editable=False)
+    rating = models.PositiveSmallIntegerField(
+        'Рейтинг',
+        null=True,
+        editable=False)
+    reviews_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False)
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name', 'year', 'category')
+        indexes = (
+            models.Index(fields=('year',), name='title_year_idx'),
+            models.Index(fields=('name_normalized',),
+                         name='title_name_normalized_idx'),)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.name_normalized = normalize_text(self.name)
+        super().save(*args, **kwargs)
+
+
+class TitleGenre(models.Model):
+    """Связь произведений и жанров."""
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        verbose_name='Произведение')
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        verbose_name='Жанр')
+
+    class Meta:
+        db_table = 'reviews_title_genre'
+        verbose_name = 'жанр произведения'
+        verbose_name_plural = 'Жанры произведений'
+        unique_together = ('title', 'genre')
+        indexes = (models.Index(
+            fields=('genre', 'title'),
+            name='title_genre_genre_idx'),)
+
+    def __str__(self):
+        return f'{self.title_id} — {self.genre_id}'
+
 
 class Review(TextPubdateModel):
     """Модель отзывов."""
@@ -148,10 +267,39 @@ class Review(TextPubdateModel):
         constraints = (models.UniqueConstraint(
             fields=('author', 'title'),
             name='unique_author_title'),)
+        indexes = (models.Index(
+            fields=('title', '-pub_date', '-id'),
+            name='review_title_pub_date_idx'),)
 
     def __str__(self):
         return f'Отзыв к произведению "{self.title.name}"'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_score = instance.__dict__.get('score')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и обновляет рейтинг в той же транзакции."""
+        with transaction.atomic(savepoint=False):
+            adding = self._state.adding
+            if adding:
+                count_delta, score_delta = 1, self.score
+            else:
+                count_delta, score_delta = 0, self.score - self._saved_score
+            # Рейтинг обновляется до вставки: число обновлённых строк
+            # заменяет отдельную проверку наличия произведения.
+            if count_delta or score_delta:
+                updated = Title.objects.filter(
+                    pk=self.title_id).apply_review_delta(
+                        count_delta, score_delta)
+                if adding and not updated:
+                    raise Title.DoesNotExist(
+                        'Произведение для отзыва не найдено.')
+            super().save(*args, **kwargs)
+        self._saved_score = self.score
+
 
 class Comment(TextPubdateModel):
     """Модель комментариев."""
@@ -170,6 +318,58 @@ class Comment(TextPubdateModel):
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (models.Index(
+            fields=('review', '-pub_date', '-id'),
+            name='comment_review_pub_date_idx'),)
 
     def __str__(self):
         return self.text
+
+
+class OutgoingEmail(models.Model):
+    """Модель очереди исходящих писем."""
+
+    PENDING = EMAIL_PENDING
+
+    recipient = models.EmailField(
+        'Получатель',
+        max_length=EMAILFIELD_MAX_LENGTH)
+    from_email = models.EmailField(
+        'Отправитель',
+        max_length=EMAILFIELD_MAX_LENGTH)
+    subject = models.CharField(
+        'Тема',
+        max_length=EMAIL_SUBJECT_MAX_LENGTH)
+    body = models.TextField('Текст')
+    status = models.CharField(
+        'Статус',
+        default=EMAIL_PENDING,
+        choices=EMAIL_STATUSES,
+        max_length=EMAIL_STATUS_MAX_LENGTH)
+    attempts = models.PositiveSmallIntegerField(
+        'Попытки отправки',
+        default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now)
+    last_error = models.TextField(
+        'Последняя ошибка',
+        blank=True)
+    created_at = models.DateTimeField(
+        'Дата создания',
+        auto_now_add=True)
+    sent_at = models.DateTimeField(
+        'Дата отправки',
+        null=True,
+        blank=True)
+
+    class Meta:
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('id',)
+        indexes = (models.Index(
+            fields=('status', 'next_attempt_at'),
+            name='outgoing_email_queue_idx'),)
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipient}'
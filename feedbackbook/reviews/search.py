@@ -0,0 +1,176 @@
+"""Полнотекстовый поиск по произведениям и отзывам на SQLite FTS5.
+
+Индекс хранится в виртуальной таблице `reviews_search`. Строки
+произведений и отзывов различаются по rowid: для произведения это
+`id * 2`, для отзыва `id * 2 + 1`, поэтому обновление строки индекса
+выполняется поиском по первичному ключу. Токенизатор unicode61 приводит
+кириллицу к нижнему регистру, но не отождествляет ё и е, поэтому ё
+заменяется на е при индексации. Слова запроса усекаются до основы и
+ищутся по префиксу.
+"""
+import re
+
+from django.db import connection
+
+from core.utils import normalize_text
+
+SEARCH_TABLE = 'reviews_search'
+TITLE = 'title'
+REVIEW = 'review'
+SNIPPET_TOKENS = 12
+FOLD_YO_SQL = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+RUSSIAN_ENDINGS = sorted((
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ешь', 'ишь',
+    'ете', 'ите', 'ать', 'ять', 'ить', 'ом', 'ем', 'ой', 'ей', 'ам', 'ям',
+    'ах', 'ях', 'ых', 'их', 'ым', 'им', 'ую', 'юю', 'ая', 'яя', 'ое', 'ее',
+    'ий', 'ый', 'ов', 'ев', 'а', 'я', 'ы', 'и', 'у', 'ю', 'е', 'о', 'ь',
+), key=len, reverse=True)
+MIN_STEM_LENGTH = 4
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def stem(word):
+    """Отсекает типичное окончание русского слова."""
+    for ending in RUSSIAN_ENDINGS:
+        if (word.endswith(ending)
+                and len(word) - len(ending) >= MIN_STEM_LENGTH):
+            return word[:-len(ending)]
+    return word
+
+
+def build_match_expression(query):
+    """Строит выражение MATCH: все слова запроса как префиксы основ."""
+    words = WORD_PATTERN.findall(normalize_text(query))
+    return ' '.join(f'"{stem(word)}"*' for word in words)
+
+
+def fold_yo(text):
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def _replace_row(rowid, name, body, kind, object_id, title_id,
+                 created=False):
+    with connection.cursor() as cursor:
+        # Первичные ключи не переиспользуются, поэтому у новой записи
+        # строки в индексе ещё нет.
+        if not created:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} '
+            '(rowid, name, body, kind, object_id, title_id) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            [rowid, fold_yo(name), fold_yo(body), kind, object_id, title_id])
+
+
+def _delete_row(rowid):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [rowid])
+
+
+def index_title(title):
+    if is_supported():
+        _replace_row(title.pk * 2, title.name, title.description,
+                     TITLE, title.pk, title.pk)
+
+
+def unindex_title(title):
+    if is_supported():
+        _delete_row(title.pk * 2)
+
+
+def index_review(review, created=False):
+    if is_supported():
+        _replace_row(review.pk * 2 + 1, '', review.text,
+                     REVIEW, review.pk, review.title_id, created)
+
+
+def index_reviews(reviews):
+    """Добавляет в индекс новые отзывы одним executemany."""
+    if not is_supported() or not reviews:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} '
+            '(rowid, name, body, kind, object_id, title_id) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            [(review.pk * 2 + 1, '', fold_yo(review.text), REVIEW,
+              review.pk, review.title_id) for review in reviews])
+
+
+def unindex_review(review):
+    if is_supported():
+        _delete_row(review.pk * 2 + 1)
+
+
+def unindex_title_reviews(title):
+    """Убирает из индекса все отзывы произведения одним запросом."""
+    if is_supported():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ('
+                'SELECT id * 2 + 1 FROM reviews_review WHERE title_id = %s)',
+                [title.pk])
+
+
+def rebuild():
+    """Перестраивает индекс по таблицам произведений и отзывов."""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} '
+            '(rowid, name, body, kind, object_id, title_id) '
+            f"SELECT id * 2, {FOLD_YO_SQL.format('name')}, "
+            f"{FOLD_YO_SQL.format('description')}, '{TITLE}', id, id "
+            'FROM reviews_title')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} '
+            '(rowid, name, body, kind, object_id, title_id) '
+            f"SELECT id * 2 + 1, '', {FOLD_YO_SQL.format('text')}, "
+            f"'{REVIEW}', id, title_id FROM reviews_review")
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+
+
+class SearchResults:
+    """Ленивый результат поиска для пагинации смещением.
+
+    Поддерживает `count()` и срезы, поэтому LimitOffsetPagination
+    выполняет ровно один COUNT и один запрос страницы.
+    """
+
+    fields = ('kind', 'id', 'title_id', 'name', 'snippet', 'rank')
+
+    def __init__(self, query):
+        self.match = build_match_expression(query or '')
+
+    def count(self):
+        if not self.match or not is_supported():
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s', [self.match])
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, page):
+        if not self.match or not is_supported():
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT kind, object_id, title_id, name, '
+                f"snippet({SEARCH_TABLE}, -1, '<mark>', '</mark>', '…', "
+                f'{SNIPPET_TOKENS}), '
+                f'bm25({SEARCH_TABLE}, 10.0, 1.0) AS rank '
+                f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+                'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, page.stop - page.start, page.start])
+            return [dict(zip(self.fields, row)) for row in cursor.fetchall()]
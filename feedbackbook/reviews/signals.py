@@ -0,0 +1,79 @@
+import threading
+from collections import defaultdict
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import search
+from .models import Review, Title
+
+# Удаляемые произведения и отзывы: Django отправляет pre_delete родителя
+# до удаления дочерних строк, а post_delete - после.
+_deleting = threading.local()
+
+
+def get_deleting(model):
+    if not hasattr(_deleting, 'objects'):
+        _deleting.objects = defaultdict(set)
+    return _deleting.objects[model]
+
+
+def is_title_deleting(title_id):
+    """Удаляется ли произведение вместе с отзывами в текущем потоке."""
+    return title_id in get_deleting(Title)
+
+
+def is_review_deleting(review_id):
+    """Удаляется ли отзыв вместе с комментариями в текущем потоке."""
+    return review_id in get_deleting(Review)
+
+
+@receiver(pre_delete, sender=Title)
+def mark_title_deleting(sender, instance, **kwargs):
+    get_deleting(Title).add(instance.pk)
+    # Отзывы ещё не удалены: их строки индекса находятся по таблице.
+    search.unindex_title_reviews(instance)
+
+
+@receiver(pre_delete, sender=Review)
+def mark_review_deleting(sender, instance, **kwargs):
+    get_deleting(Review).add(instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def subtract_review_score(sender, instance, **kwargs):
+    """Убирает оценку удалённого отзыва из рейтинга произведения.
+
+    При удалении самого произведения рейтинг не обновляется.
+    """
+    if is_title_deleting(instance.title_id):
+        return
+    Title.objects.filter(pk=instance.title_id).apply_review_delta(
+        -1, -instance._saved_score)
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, **kwargs):
+    search.index_title(instance)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    search.unindex_title(instance)
+
+
+@receiver(post_save, sender=Review)
+def index_review(sender, instance, created, **kwargs):
+    search.index_review(instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def unindex_review(sender, instance, **kwargs):
+    if not is_title_deleting(instance.title_id):
+        search.unindex_review(instance)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+def unmark_deleting(sender, instance, **kwargs):
+    get_deleting(sender).discard(instance.pk)
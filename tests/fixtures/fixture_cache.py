@@ -0,0 +1,13 @@
+import pytest
+from django.core.cache import cache
+
+from api.caches import verified_token_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    verified_token_cache.clear()
+    yield
+    cache.clear()
+    verified_token_cache.clear()
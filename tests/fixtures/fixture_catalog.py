@@ -0,0 +1,24 @@
+import pytest
+
+from reviews.models import Category, Title
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Фильм', slug='films')
+
+
+@pytest.fixture
+def make_titles(category):
+    """Создаёт произведения `Произведение N` в категории фильмов."""
+    def make_titles(count, **fields):
+        fields = {'year': 2000, 'description': '', 'category': category,
+                  **fields}
+        return [Title.objects.create(name=f'Произведение {idx}', **fields)
+                for idx in range(count)]
+    return make_titles
+
+
+@pytest.fixture
+def title(make_titles):
+    return make_titles(1)[0]
@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, client, admin_client,
+                                              user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Хорошо', 8)
+        review = create_single_review(
+            moderator_client, title_id, 'Плохо', 3
+        ).json()
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что после создания отзывов рейтинг произведения '
+            'равен средней оценке.'
+        )
+
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review['id']
+        )
+        response = moderator_client.patch(review_url, data={'score': 10})
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(client, title_id) == 9, (
+            'Проверьте, что после изменения оценки в отзыве рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        response = moderator_client.delete(review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 8, (
+            'Проверьте, что после удаления отзыва его оценка не участвует '
+            'в рейтинге произведения.'
+        )
+
+    def test_02_recalculate_ratings_command(self, client, admin_client,
+                                            user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Хорошо', 7)
+        Title.objects.update(rating=None, reviews_count=0, score_sum=0)
+
+        call_command('recalculate_ratings')
+
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating, title.reviews_count, title.score_sum) == (
+            7, 1, 7
+        ), (
+            'Проверьте, что команда `recalculate_ratings` восстанавливает '
+            'агрегаты оценок по таблице отзывов.'
+        )
+        assert self.get_rating(client, titles[1]['id']) is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен `None`.'
+        )
+
+    def test_03_title_delete_skips_rating_updates(self, django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000,
+                                     description='')
+        for idx in range(20):
+            Review.objects.create(
+                title=title, text='Отзыв', score=5,
+                author=django_user_model.objects.create(
+                    username=f'reader{idx}', email=f'reader{idx}@yamdb.fake'))
+        with CaptureQueriesContext(connection) as context:
+            title.delete()
+        updates = [query for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE "reviews_title"')]
+        assert not updates, (
+            'Проверьте, что удаление произведения не обновляет его рейтинг '
+            'для каждого удаляемого отзыва.'
+        )
+        assert not Review.objects.exists()
@@ -0,0 +1,182 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.benchmark import collect_url_names
+from api.urls import urlpatterns
+from reviews.models import Comment, Genre, Review, Title
+
+PAGE_SIZE = 10
+
+# Максимальное число SQL-запросов на один запрос к эндпоинту.
+# Бюджет не должен зависеть от количества объектов на странице.
+QUERY_BUDGETS = {
+    ('api-root', 'get'): 1,
+    ('customuser-list', 'get'): 3,
+    ('customuser-detail', 'get'): 2,
+    ('customuser-detail', 'patch'): 3,
+    ('customuser-detail', 'delete'): 9,
+    ('customuser-set-profile', 'get'): 2,
+    ('customuser-set-profile', 'patch'): 3,
+    ('title-list', 'get'): 4,
+    ('title-detail', 'get'): 3,
+    ('title-detail', 'patch'): 7,
+    ('title-detail', 'delete'): 13,
+    ('category-list', 'get'): 3,
+    ('category-detail', 'delete'): 6,
+    ('genre-list', 'get'): 3,
+    ('genre-detail', 'delete'): 5,
+    ('reviews-list', 'get'): 4,
+    ('reviews-detail', 'get'): 3,
+    ('reviews-detail', 'patch'): 8,
+    ('reviews-detail', 'delete'): 9,
+    ('comments-list', 'get'): 4,
+    ('comments-detail', 'get'): 3,
+    ('comments-detail', 'patch'): 4,
+    ('comments-detail', 'delete'): 5,
+    ('search-list', 'get'): 3,
+    ('signup', 'post'): 5,
+    # Пакетная загрузка: бюджет на пачку из PAGE_SIZE строк.
+    ('bulk-reviews', 'post'): 10,
+    ('bulk-comments', 'post'): 5,
+    # Выгрузка читается одним запросом независимо от числа строк.
+    ('export-reviews', 'get'): 2,
+    ('export-comments', 'get'): 2,
+    ('token', 'post'): 1,
+}
+
+
+@pytest.fixture
+def catalog(admin, django_user_model, category, make_titles):
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    titles = make_titles(PAGE_SIZE + 5)
+    for title in titles:
+        title.genre.set(genres[:2])
+    authors = [
+        django_user_model.objects.create(
+            username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+        )
+        for idx in range(PAGE_SIZE + 5)
+    ]
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=author, text='Отзыв', score=5
+        )
+        for author in authors
+    ]
+    comments = [
+        Comment.objects.create(review=reviews[0], author=author, text='Да')
+        for author in authors
+    ]
+    return {
+        'title': titles[0], 'review': reviews[0], 'comment': comments[0],
+        'category': category, 'genre': genres[0], 'user': admin
+    }
+
+
+def build_url(name, catalog):
+    kwargs = {
+        'customuser-detail': {'username': catalog['user'].username},
+        'category-detail': {'slug': catalog['category'].slug},
+        'genre-detail': {'slug': catalog['genre'].slug},
+        'title-detail': {'pk': catalog['title'].pk},
+        'reviews-list': {'title_id': catalog['title'].pk},
+        'reviews-detail': {'title_id': catalog['title'].pk,
+                           'pk': catalog['review'].pk},
+        'comments-list': {'title_id': catalog['title'].pk,
+                          'review_id': catalog['review'].pk},
+        'comments-detail': {'title_id': catalog['title'].pk,
+                            'review_id': catalog['review'].pk,
+                            'pk': catalog['comment'].pk},
+    }.get(name, {})
+    return reverse(f'api:{name}', kwargs=kwargs)
+
+
+REQUEST_DATA = {
+    'search-list': {'q': 'произведение'},
+    'signup': {'username': 'budget_user', 'email': 'budget@yamdb.fake'},
+    'token': {'username': 'budget_user', 'confirmation_code': '0'},
+    ('title-detail', 'patch'): {'name': 'Новое название'},
+    ('customuser-detail', 'patch'): {'first_name': 'Имя'},
+    ('customuser-set-profile', 'patch'): {'first_name': 'Имя'},
+    ('reviews-detail', 'patch'): {'text': 'Новый текст', 'score': 7},
+    ('comments-detail', 'patch'): {'text': 'Новый текст'},
+    'bulk-reviews': lambda catalog: '\n'.join(json.dumps({
+        'title_id': catalog['title'].pk + idx, 'author': 'TestAdmin',
+        'text': 'Отзыв', 'score': 5}) for idx in range(PAGE_SIZE)),
+    'bulk-comments': lambda catalog: '\n'.join(json.dumps({
+        'review_id': catalog['review'].pk, 'author': 'TestAdmin',
+        'text': 'Комментарий'}) for _ in range(PAGE_SIZE)),
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryBudget:
+
+    def test_01_every_endpoint_has_budget(self):
+        declared = {name for name, _ in QUERY_BUDGETS}
+        missing = collect_url_names(urlpatterns) - declared
+        assert not missing, (
+            'Для эндпоинтов из `api/urls.py` должен быть объявлен бюджет '
+            f'SQL-запросов в `QUERY_BUDGETS`. Не объявлен для: {missing}.'
+        )
+
+    @pytest.mark.parametrize('name,method', sorted(QUERY_BUDGETS))
+    def test_02_endpoint_within_budget(self, name, method, catalog,
+                                       admin_client,
+                                       django_assert_max_num_queries):
+        url = build_url(name, catalog)
+        data = REQUEST_DATA.get((name, method), REQUEST_DATA.get(name))
+        extra = {}
+        if callable(data):
+            data = data(catalog)
+            extra['content_type'] = 'application/x-ndjson'
+        elif method == 'patch':
+            data = json.dumps(data)
+            extra['content_type'] = 'application/json'
+        with django_assert_max_num_queries(QUERY_BUDGETS[name, method]):
+            response = getattr(admin_client, method)(url, data=data, **extra)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        if method in ('patch', 'delete') or callable(
+                REQUEST_DATA.get(name)):
+            assert response.status_code < 400, (
+                f'Запрос {method.upper()} к `{url}` должен быть успешным, '
+                f'получен статус {response.status_code}.'
+            )
+
+    def test_03_title_delete_independent_of_reviews(
+            self, catalog, admin_client, django_user_model):
+        title = catalog['title']
+        other = Title.objects.create(
+            name='Без отзывов', year=2000, description='',
+            category=catalog['category'])
+        for idx in range(PAGE_SIZE * 3):
+            author = django_user_model.objects.create(
+                username=f'reader{idx}', email=f'reader{idx}@yamdb.fake')
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=7)
+            Comment.objects.create(review=review, author=author, text='Да')
+        review = Review.objects.create(
+            title=other, author=catalog['user'], text='Отзыв', score=5)
+        Comment.objects.create(
+            review=review, author=catalog['user'], text='Да')
+        admin_client.get(reverse('api:title-detail', kwargs={'pk': other.pk}))
+        counts = []
+        for obj in (other, title):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.delete(
+                    reverse('api:title-detail', kwargs={'pk': obj.pk}))
+            assert response.status_code == 204
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1] <= QUERY_BUDGETS[
+            'title-detail', 'delete'], (
+            'Проверьте, что число запросов при удалении произведения не '
+            f'зависит от числа отзывов: {counts}.'
+        )
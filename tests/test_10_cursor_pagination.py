@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reviews.models import Review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture
+    def reviews(self, django_user_model, title):
+        for idx in range(15):
+            author = django_user_model.objects.create(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text=f'Отзыв {idx}', score=5
+            )
+        return title
+
+    def test_01_cursor_pages_cover_all_reviews(self, client, reviews):
+        url = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=reviews.id)
+            + '?pagination=cursor'
+        )
+        seen = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что курсорная пагинация отзывов доступна по '
+                'параметру `pagination=cursor`.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Курсорная пагинация не должна считать общее количество '
+                'отзывов.'
+            )
+            seen.extend(review['id'] for review in data['results'])
+            url = data['next']
+
+        expected = list(
+            Review.objects.filter(title=reviews)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+        assert seen == expected, (
+            'Проверьте, что курсорная пагинация возвращает каждый отзыв '
+            'ровно один раз в порядке убывания даты публикации.'
+        )
+
+    def test_02_offset_pagination_by_default(self, client, reviews):
+        response = client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=reviews.id)
+        )
+        data = response.json()
+        assert data.get('count') == 15, (
+            'Проверьте, что без параметра `pagination` отзывы по-прежнему '
+            'пагинируются смещением и ответ содержит `count`.'
+        )
+
+    def test_03_same_pub_date_without_offset(self, client, reviews):
+        Review.objects.update(pub_date=timezone.now())
+        url = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=reviews.id)
+            + '?pagination=cursor'
+        )
+        seen = []
+        with CaptureQueriesContext(connection) as context:
+            while url:
+                data = client.get(url).json()
+                seen.append([review['id'] for review in data['results']])
+                url = data['next']
+        expected = list(
+            Review.objects.order_by('-id').values_list('id', flat=True)
+        )
+        assert sum(seen, []) == expected, (
+            'Проверьте, что курсор по паре (pub_date, id) возвращает '
+            'отзывы с одинаковой датой публикации ровно один раз.'
+        )
+        assert not [query for query in context.captured_queries
+                    if 'OFFSET' in query['sql']], (
+            'Проверьте, что курсорные страницы выбираются без OFFSET.'
+        )
+
+        previous = data['previous']
+        pages = []
+        while previous:
+            data = client.get(previous).json()
+            pages.insert(0, [review['id'] for review in data['results']])
+            previous = data['previous']
+        assert pages == seen[:-1], (
+            'Проверьте, что ссылки `previous` возвращают предыдущие '
+            'страницы курсора.'
+        )
@@ -0,0 +1,53 @@
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleCount:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_cached_count_reset_on_title_write(self, client,
+                                                  admin_client,
+                                                  django_assert_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        url = f'{self.TITLES_URL}?category={categories[0]["slug"]}'
+        data = client.get(url).json()
+        assert data['count'] == 1 and data['count_exact'] is True, (
+            f'Проверьте, что ответ на GET-запрос к `{self.TITLES_URL}` '
+            'содержит точное количество произведений и признак '
+            '`count_exact`.'
+        )
+
+        with django_assert_num_queries(2):
+            client.get(f'{self.TITLES_URL}?limit=5&category='
+                       f'{categories[0]["slug"]}')
+
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Терминатор 2',
+            'year': 1991,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+            'description': 'Hasta la vista, baby'
+        })
+        data = client.get(url).json()
+        assert data['count'] == 2, (
+            'Проверьте, что кешированное количество произведений '
+            'сбрасывается при создании произведения.'
+        )
+
+        admin_client.delete(f'{self.TITLES_URL}{titles[0]["id"]}/')
+        data = client.get(url).json()
+        assert data['count'] == 1, (
+            'Проверьте, что кешированное количество произведений '
+            'сбрасывается при удалении произведения.'
+        )
+
+    def test_02_estimated_count(self, client, admin_client):
+        create_titles(admin_client)
+        data = client.get(f'{self.TITLES_URL}?count=estimated').json()
+        assert data['count'] >= 2 and data['count_exact'] is False, (
+            'Проверьте, что режим `count=estimated` для списка без '
+            'фильтров возвращает оценку количества с `count_exact: false`.'
+        )
@@ -0,0 +1,56 @@
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get_names(self, client, query):
+        response = client.get(f'{self.TITLES_URL}?{query}')
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_year_range(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.get_names(client, 'year_min=1985') == [
+            'Крепкий орешек'
+        ], 'Проверьте фильтрацию произведений по `year_min`.'
+        assert self.get_names(client, 'year_max=1985') == ['Терминатор'], (
+            'Проверьте фильтрацию произведений по `year_max`.'
+        )
+        assert self.get_names(client, 'year=198') == [], (
+            'Фильтр `year` должен сравнивать год целиком, а не подстроку.'
+        )
+
+    def test_02_genre_in_without_duplicates(self, client, admin_client):
+        _, _, genres = create_titles(admin_client)
+        slugs = ','.join(genre['slug'] for genre in genres)
+        assert self.get_names(client, f'genre={slugs}') == [
+            'Крепкий орешек', 'Терминатор'
+        ], (
+            'Проверьте, что фильтр `genre` принимает несколько слагов через '
+            'запятую и не дублирует произведения с несколькими жанрами.'
+        )
+        assert self.get_names(client, 'genre=hor') == [], (
+            'Фильтр `genre` должен сравнивать слаг жанра целиком.'
+        )
+        assert self.get_names(client, 'genre_contains=hor') == [
+            'Терминатор'
+        ], 'Проверьте поиск по подстроке слага в `genre_contains`.'
+
+    def test_03_name_prefix(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.get_names(client, 'name=  КРЕПКИЙ   ор') == [
+            'Крепкий орешек'
+        ], (
+            'Проверьте, что фильтр `name` ищет по началу названия без учёта '
+            'регистра и лишних пробелов.'
+        )
+        assert self.get_names(client, 'name=орешек') == [], (
+            'Фильтр `name` должен искать по началу названия.'
+        )
+        assert self.get_names(client, 'name_contains=орешек') == [
+            'Крепкий орешек'
+        ], 'Проверьте поиск по подстроке названия в `name_contains`.'
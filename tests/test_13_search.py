@@ -0,0 +1,92 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Search:
+
+    SEARCH_URL = '/api/v1/search/'
+
+    @pytest.fixture(autouse=True)
+    def empty_index(self):
+        call_command('rebuild_search_index')
+
+    def search(self, client, query):
+        response = client.get(self.SEARCH_URL, data={'q': query})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что эндпоинт `{self.SEARCH_URL}` доступен '
+            'неавторизованному пользователю.'
+        )
+        return response.json()
+
+    def test_01_search_titles_and_reviews(self, client, admin_client,
+                                          user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(
+            user_client, titles[1]['id'], 'Отличные спецэффекты и ёлка', 9
+        )
+
+        data = self.search(client, 'крепкого')
+        assert [item['kind'] for item in data['results']] == ['title'], (
+            'Проверьте, что поиск находит произведение по словоформе '
+            'названия.'
+        )
+        assert data['results'][0]['id'] == titles[1]['id']
+
+        data = self.search(client, 'СПЕЦЭФФЕКТОВ елка')
+        assert data['count'] == 1, (
+            'Проверьте, что поиск по тексту отзыва не зависит от регистра, '
+            'словоформы и буквы ё.'
+        )
+        result = data['results'][0]
+        assert result['kind'] == 'review'
+        assert result['title_id'] == titles[1]['id']
+        assert '<mark>' in result['snippet'], (
+            'Проверьте, что результаты поиска содержат фрагмент текста с '
+            'подсвеченными совпадениями.'
+        )
+
+    def test_02_index_follows_deletes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert self.search(client, 'терминатор')['count'] == 0, (
+            'Проверьте, что удалённое произведение пропадает из поискового '
+            'индекса.'
+        )
+        assert self.search(client, '')['count'] == 0
+
+    def test_03_title_delete_unindexes_reviews_once(
+            self, client, user_client, user, django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000,
+                                     description='')
+        reviews = [Review.objects.create(
+            title=title, text='Незабываемые впечатления', score=5,
+            author=django_user_model.objects.create(
+                username=f'reader{idx}', email=f'reader{idx}@yamdb.fake'))
+            for idx in range(20)]
+        Comment.objects.create(review=reviews[0], author=user, text='Да')
+        comments_url = (f'/api/v1/titles/{title.pk}/reviews/'
+                        f'{reviews[0].pk}/comments/')
+        assert user_client.get(comments_url).status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as context:
+            title.delete()
+        deletes = [query for query in context.captured_queries
+                   if 'DELETE FROM reviews_search' in query['sql']]
+        assert len(deletes) <= 2, (
+            'Проверьте, что отзывы удаляемого произведения убираются из '
+            'индекса одним запросом.'
+        )
+        assert self.search(client, 'впечатления')['count'] == 0
+        assert user_client.get(comments_url).status_code == (
+            HTTPStatus.NOT_FOUND
+        ), (
+            'Проверьте, что удаление произведения сбрасывает кеш наличия '
+            'его отзывов.'
+        )
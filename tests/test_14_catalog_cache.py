@@ -0,0 +1,51 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14CatalogCache:
+
+    @pytest.mark.parametrize('url,create', (
+        ('/api/v1/categories/', create_categories),
+        ('/api/v1/genres/', create_genre),
+    ))
+    def test_01_list_etag(self, client, admin_client, url, create,
+                          django_assert_num_queries):
+        create(admin_client)
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит ETag.'
+        )
+        count = response.json()['count']
+
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.json()['count'] == count, (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдаёт список '
+            'из кеша без запросов к базе данных.'
+        )
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с совпадающим '
+            'If-None-Match возвращает ответ со статусом 304.'
+        )
+        assert not response.content
+
+        admin_client.post(url, data={'name': 'Новое', 'slug': 'new-slug'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после создания объекта через `{url}` ETag '
+            'списка меняется.'
+        )
+        assert response.json()['count'] == count + 1
+
+        admin_client.delete(f'{url}new-slug/')
+        assert client.get(url).json()['count'] == count, (
+            f'Проверьте, что после удаления объекта через `{url}` список '
+            'перестаёт отдаваться из кеша.'
+        )
@@ -0,0 +1,152 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, CustomUser, Genre
+from tests.utils import (create_comments, create_reviews,
+                         create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ConditionalRequests:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_title_detail_not_modified(self, client, admin_client,
+                                          user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки ETag и Last-Modified.'
+        )
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            'If-None-Match возвращает ответ со статусом 304.'
+        )
+
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 7)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение рейтинга произведения меняет его ETag.'
+        )
+        assert response.json()['rating'] == 7
+
+    def test_02_review_list_not_modified(self, client, admin_client, admin):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        etag = client.get(url).get('ETag')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            'If-None-Match возвращает ответ со статусом 304.'
+        )
+
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление отзыва меняет ETag списка отзывов.'
+        )
+
+    def test_03_patch_if_match(self, admin_client, admin):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = (self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+               + f'{reviews[0]["id"]}/')
+        etag = admin_client.get(url).get('ETag')
+
+        response = admin_client.patch(
+            url, data={'text': 'Новый текст'}, HTTP_IF_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что PATCH-запрос к `{url}` с актуальным If-Match '
+            'выполняется.'
+        )
+
+        response = admin_client.patch(
+            url, data={'text': 'Ещё текст'}, HTTP_IF_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.PRECONDITION_FAILED, (
+            f'Проверьте, что PATCH-запрос к `{url}` с устаревшим If-Match '
+            'возвращает ответ со статусом 412.'
+        )
+
+    def test_04_nested_fields_change_etag(self, client, admin_client,
+                                          admin):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        title_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'])
+        urls = (self.TITLES_URL, title_url)
+        etags = {url: client.get(url).get('ETag') for url in urls}
+        category = Category.objects.get(slug=titles[0]['category'])
+        category.name = 'Кино'
+        category.save()
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что переименование категории меняет ETag `{url}`.'
+            )
+        etag = client.get(self.TITLES_URL).get('ETag')
+        Genre.objects.filter(slug=titles[0]['genre'][0]).get().save()
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение жанра меняет ETag списка произведений.'
+        )
+
+        review_url = f'{reviews_url}{reviews[0]["id"]}/'
+        urls = (reviews_url, review_url)
+        etags = {url: client.get(url).get('ETag') for url in urls}
+        user = CustomUser.objects.get(pk=admin.pk)
+        user.username = 'RenamedAdmin'
+        user.save()
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что смена имени автора меняет ETag `{url}`.'
+            )
+
+    def test_05_list_etag_without_scan(self, client, admin_client, admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client})
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'])
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        client.get(comments_url)
+        with CaptureQueriesContext(connection) as context:
+            etags = {url: client.get(url).get('ETag')
+                     for url in (self.TITLES_URL, reviews_url, comments_url)}
+        assert not [query for query in context.captured_queries
+                    if 'MAX(' in query['sql']], (
+            'Проверьте, что ETag списка строится без агрегата по всем '
+            'объектам списка.'
+        )
+
+        admin_client.patch(f'{reviews_url}{reviews[0]["id"]}/',
+                           data=json.dumps({'text': 'Новый текст'}),
+                           content_type='application/json')
+        response = client.get(reviews_url,
+                              HTTP_IF_NONE_MATCH=etags[reviews_url])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение текста отзыва меняет ETag списка.'
+        )
+        create_single_comment(admin_client, titles[0]['id'],
+                              reviews[0]['id'], 'Ещё комментарий')
+        response = client.get(comments_url,
+                              HTTP_IF_NONE_MATCH=etags[comments_url])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет ETag списка.'
+        )
+        response = client.get(self.TITLES_URL,
+                              HTTP_IF_NONE_MATCH=etags[self.TITLES_URL])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет ETag списка произведений.'
+        )
@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+
+from reviews.models import OutgoingEmail
+
+
+class FailingEmailBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    SIGNUP_DATA = {'email': 'outbox@yamdb.fake', 'username': 'outbox_user'}
+
+    def test_01_signup_only_enqueues(self, client):
+        outbox_before_count = len(mail.outbox)
+        response = client.post(self.URL_SIGNUP, data=self.SIGNUP_DATA)
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` не отправляет '
+            'письмо синхронно, а только ставит его в очередь.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == self.SIGNUP_DATA['email']
+        assert email.status == OutgoingEmail.PENDING
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_outbox` отправляет письма из '
+            'очереди.'
+        )
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == ('sent', 1), (
+            'Проверьте, что отправленное письмо помечается как `sent`.'
+        )
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_retry_with_backoff(self, client, settings):
+        settings.EMAIL_BACKEND = (
+            'tests.test_16_email_outbox.FailingEmailBackend'
+        )
+        client.post(self.URL_SIGNUP, data=self.SIGNUP_DATA)
+        email = OutgoingEmail.objects.get()
+        queued_at = email.next_attempt_at
+
+        call_command('send_outbox', '--max-attempts=2')
+        email.refresh_from_db()
+        assert email.status == 'pending' and email.attempts == 1, (
+            'Проверьте, что письмо, которое не удалось отправить, остаётся '
+            'в очереди до исчерпания попыток.'
+        )
+        assert email.next_attempt_at > queued_at and email.last_error, (
+            'Проверьте, что повторная отправка откладывается, а ошибка '
+            'сохраняется.'
+        )
+
+        OutgoingEmail.objects.update(next_attempt_at=queued_at)
+        call_command('send_outbox', '--max-attempts=2')
+        email.refresh_from_db()
+        assert email.status == 'failed' and email.attempts == 2, (
+            'Проверьте, что после исчерпания попыток письмо помечается '
+            'как `failed`.'
+        )
@@ -0,0 +1,98 @@
+import csv
+import shutil
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from reviews.loading import load_rows
+from reviews.models import Category, Review, Title, TitleGenre
+
+DATA_DIR = Path(settings.STATICFILES_DIRS[0]) / 'data'
+
+
+def count_rows(path):
+    with open(path, encoding='utf-8', newline='') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    shutil.copytree(DATA_DIR, tmp_path / 'data')
+    return tmp_path / 'data'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17LoadCsv:
+
+    def test_01_load_in_chunks(self, data_dir):
+        call_command('load_csv', path=str(data_dir), chunk_size=7)
+        assert Review.objects.count() == count_rows(data_dir / 'review.csv')
+        assert TitleGenre.objects.count() == count_rows(
+            data_dir / 'genre_title.csv'
+        ), (
+            'Проверьте, что команда `load_csv` загружает связи произведений '
+            'и жанров из `genre_title.csv`.'
+        )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что команда `load_csv` сохраняет даты из файла.'
+        )
+        title = Title.objects.get(pk=1)
+        assert title.rating is not None and title.name_normalized, (
+            'Проверьте, что после загрузки рейтинги и нормализованные '
+            'названия произведений заполнены.'
+        )
+
+    def test_02_upsert_and_truncate(self, data_dir):
+        call_command('load_csv', path=str(data_dir))
+        titles_path = data_dir / 'titles.csv'
+        with open(titles_path, encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            fieldnames, rows = reader.fieldnames, list(reader)
+        rows[0]['name'] = 'Новое Название'
+        with open(titles_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+        call_command('load_csv', path=str(data_dir), upsert=True)
+        title = Title.objects.get(pk=rows[0]['id'])
+        assert title.name == 'Новое Название', (
+            'Проверьте, что команда `load_csv --upsert` обновляет '
+            'существующие записи.'
+        )
+        assert title.name_normalized == 'новое название'
+        assert Title.objects.count() == len(rows)
+
+        call_command('load_csv', path=str(data_dir), truncate=True)
+        assert Title.objects.count() == len(rows), (
+            'Проверьте, что команда `load_csv --truncate` очищает таблицы '
+            'перед загрузкой.'
+        )
+        assert Review.objects.count() == count_rows(data_dir / 'review.csv')
+
+    def test_03_loading_resets_api_caches(self, client, user):
+        Category.objects.create(name='Книги', slug='books')
+        title = Title.objects.create(name='Произведение', year=2000)
+        categories_url = '/api/v1/categories/'
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        first = client.get(categories_url)
+        assert client.get(reviews_url).json()['count'] == 0
+        load_rows(Category, [{'name': 'Фильмы', 'slug': 'films'}],
+                  ('name', 'slug'), chunk_size=10)
+        load_rows(Review, [{'title_id': str(title.pk),
+                            'author_id': str(user.pk), 'text': 'Отзыв',
+                            'score': '5'}],
+                  ('title_id', 'author_id', 'text', 'score'), chunk_size=10)
+        response = client.get(
+            categories_url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert response.status_code == 200
+        assert response.json()['count'] == 2, (
+            'Проверьте, что загрузка строк сбрасывает кеш списка категорий.'
+        )
+        assert client.get(reviews_url).json()['count'] == 1, (
+            'Проверьте, что загрузка отзывов сбрасывает версии списков '
+            'отзывов.'
+        )
@@ -0,0 +1,80 @@
+import filecmp
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews import dataset
+from reviews.management.commands.generate_dataset import Command
+from reviews.models import Comment, CustomUser, Review, Title, TitleGenre
+
+SCALE = {'users': 30, 'categories': 3, 'genres': 5, 'titles': 20,
+         'genres_per_title': 2, 'reviews': 500, 'comments': 100,
+         'chunk_size': 64}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18GenerateDataset:
+
+    def test_01_csv_is_deterministic(self, tmp_path):
+        call_command('generate_dataset', output=str(tmp_path / 'one'),
+                     workers=1, **SCALE)
+        call_command('generate_dataset', output=str(tmp_path / 'two'),
+                     workers=2, max_pending=1, **SCALE)
+        files = sorted(path.name for path in (tmp_path / 'one').iterdir())
+        _, mismatch, errors = filecmp.cmpfiles(
+            tmp_path / 'one', tmp_path / 'two', files, shallow=False)
+        assert len(files) == 7 and not mismatch and not errors, (
+            'Проверьте, что команда `generate_dataset` с одинаковым зерном '
+            'создаёт одинаковые файлы при любом числе процессов.'
+        )
+
+        call_command('load_csv', path=str(tmp_path / 'one'))
+        assert Review.objects.count() == SCALE['reviews'], (
+            'Проверьте, что файлы `generate_dataset` загружаются командой '
+            '`load_csv`.'
+        )
+
+    def test_02_write_to_database(self):
+        call_command('generate_dataset', workers=1, **SCALE)
+        assert CustomUser.objects.count() == SCALE['users']
+        assert Title.objects.count() == SCALE['titles']
+        assert Review.objects.count() == SCALE['reviews']
+        assert Comment.objects.count() == SCALE['comments']
+        assert TitleGenre.objects.exists()
+        assert not Title.objects.filter(rating__isnull=True).exists(), (
+            'Проверьте, что после генерации рейтинги произведений '
+            'пересчитаны.'
+        )
+
+    def test_03_reviews_limit(self):
+        with pytest.raises(CommandError):
+            call_command('generate_dataset', workers=1,
+                         **{**SCALE, 'reviews': 601})
+
+    def test_04_pending_chunks_are_bounded(self):
+        submitted = []
+
+        class Result:
+            def __init__(self, value):
+                self.value = value
+
+            def get(self):
+                return self.value
+
+        class Pool:
+            def apply_async(self, func, args):
+                submitted.append(args[0])
+                return Result(func(*args))
+
+        tasks = list(dataset.plan(
+            dataset.Scale(*(SCALE[name] for name in dataset.Scale._fields)),
+            SCALE['chunk_size'], 'yamdb'))
+        consumed = 0
+        for chunk in Command.generate(Pool(), iter(tasks), 3):
+            assert len(submitted) - consumed <= 3, (
+                'Проверьте, что генерация опережает запись не больше чем на '
+                '`max_pending` пачек.'
+            )
+            assert chunk == dataset.generate_chunk(tasks[consumed])
+            consumed += 1
+        assert consumed == len(tasks)
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+
+from api.benchmark import (Benchmark, BenchmarkError, Scenario,
+                           collect_url_names)
+from api.urls import urlpatterns
+
+SCALE = {'users': 20, 'categories': 2, 'genres': 3, 'titles': 10,
+         'genres_per_title': 2, 'reviews': 60, 'comments': 20}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Benchmark:
+
+    def test_01_benchmark_and_compare(self, admin, tmp_path):
+        call_command('generate_dataset', workers=1, **SCALE)
+        output = tmp_path / 'baseline.json'
+        call_command('benchmark', use_existing_db=True, iterations=2,
+                     warmup=1, output=str(output))
+        results = json.loads(output.read_text(encoding='utf-8'))['results']
+        assert collect_url_names(urlpatterns) <= set(results), (
+            'Проверьте, что команда `benchmark` замеряет все маршруты из '
+            '`api/urls.py`.'
+        )
+        assert {'p50_ms', 'p95_ms', 'p99_ms', 'queries',
+                'peak_memory_kib'} <= set(results['title-list'])
+        for name in ('bulk-reviews', 'bulk-comments', 'export-reviews'):
+            assert results[name]['status'] == 200, (
+                f'Проверьте, что сценарий `{name}` замеряет успешный '
+                'запрос с подходящим методом.'
+            )
+        assert results['bulk-reviews']['method'] == 'POST'
+
+        # Каждый запуск команды начинается с холодного кеша, как в
+        # отдельном процессе.
+        cache.clear()
+        call_command('benchmark', use_existing_db=True, iterations=2,
+                     warmup=1, compare=str(output), tolerance=100,
+                     min_delta_ms=1000)
+
+        baseline = json.loads(output.read_text(encoding='utf-8'))
+        baseline['results']['title-list']['queries'] -= 1
+        output.write_text(json.dumps(baseline), encoding='utf-8')
+        cache.clear()
+        with pytest.raises(CommandError):
+            call_command('benchmark', use_existing_db=True, iterations=2,
+                         warmup=1, compare=str(output), tolerance=100,
+                         min_delta_ms=1000)
+
+    def test_02_throttling_disabled(self, admin, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'signup': '2/min',
+                                       'signup-identity': '2/min'},
+        }
+        scenario = Scenario('signup', 'signup', 'post', {
+            'username': 'benchmark_user',
+            'email': 'benchmark_user@yamdb.fake'})
+        results = Benchmark(admin, iterations=5, warmup=1).run([scenario])
+        assert results['signup']['status'] == 200, (
+            'Проверьте, что на время замера ограничение частоты запросов '
+            'отключается.'
+        )
+
+    def test_03_mixed_statuses_fail(self, admin, monkeypatch):
+        statuses = iter([200, 200, 429] * 5)
+        original = Benchmark.call
+
+        def call(self, scenario, url, data):
+            response = original(self, scenario, url, data)
+            response.status_code = next(statuses)
+            return response
+
+        monkeypatch.setattr(Benchmark, 'call', call)
+        scenario = Scenario('api-root', 'api-root', 'get', None)
+        with pytest.raises(BenchmarkError):
+            Benchmark(admin, iterations=3, warmup=1).run([scenario])
@@ -0,0 +1,54 @@
+import logging
+
+import pytest
+
+from core.middleware import http_request_duration
+
+
+def route_count(route):
+    return sum(series['count'] for labels, series
+               in http_request_duration.snapshot().items()
+               if dict(labels)['route'] == route)
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+
+
+@pytest.fixture
+def timing_log(caplog):
+    logger = logging.getLogger('core.timing')
+    logger.addHandler(caplog.handler)
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20RequestTiming:
+
+    URL_TITLES = '/api/v1/titles/'
+
+    def test_01_server_timing_header(self, client, timing_log):
+        response = client.get(self.URL_TITLES)
+        header = response.get('Server-Timing', '')
+        assert 'db;dur=' in header and 'queries"' in header, (
+            'Проверьте, что ответ содержит заголовок Server-Timing со '
+            'временем и числом SQL-запросов.'
+        )
+        assert 'serializer;dur=' in header and 'total;dur=' in header
+        assert any('"route": "api:title-list"' in record.getMessage()
+                   for record in timing_log.records), (
+            'Проверьте, что замеры запроса пишутся в лог `core.timing`.'
+        )
+        assert route_count('api:title-list') == 1, (
+            'Проверьте, что время запроса попадает в гистограмму маршрута.'
+        )
+
+    def test_02_sampling(self, client, settings):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 0
+        response = client.get(self.URL_TITLES)
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что запросы вне выборки не замеряются детально.'
+        )
+        assert route_count('api:title-list') == 1
@@ -0,0 +1,99 @@
+import multiprocessing
+import re
+
+import pytest
+
+from api.metrics import signups
+from core import metrics
+
+
+def increment_signups():
+    signups.inc(5)
+
+
+def increment_gauge(gauge):
+    gauge.inc(3)
+
+
+def get_sample(text, name, **labels):
+    label_text = ','.join(f'{key}="{value}"'
+                          for key, value in sorted(labels.items()))
+    pattern = re.escape(f'{name}{{{label_text}}}' if labels else name)
+    match = re.search(rf'^{pattern} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0
+
+
+@pytest.fixture
+def metrics_dir(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Metrics:
+
+    URL_METRICS = '/metrics'
+
+    def test_01_request_metrics(self, client, metrics_dir):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        response = client.get(self.URL_METRICS)
+        assert response.status_code == 200
+        text = response.content.decode()
+        assert get_sample(
+            text, 'yamdb_http_requests_total', action='list', method='GET',
+            route='api:title-list', status='200') == 1, (
+            f'Проверьте, что `{self.URL_METRICS}` отдаёт счётчик запросов '
+            'по маршруту и действию viewset.'
+        )
+        assert get_sample(
+            text, 'yamdb_http_request_duration_seconds_count',
+            action='list', route='api:title-list') == 1
+        assert get_sample(
+            text, 'yamdb_cache_hit_ratio', cache='categories') == 0.5, (
+            'Проверьте, что метрики содержат долю попаданий в кеш.'
+        )
+        assert 'yamdb_outbox_emails{status="pending"} 0' in text
+
+    def test_02_aggregates_processes(self, client, metrics_dir):
+        signups.inc()
+        process = multiprocessing.get_context('fork').Process(
+            target=increment_signups)
+        process.start()
+        process.join()
+        assert len(list(metrics_dir.glob('*.db'))) == 2
+        text = client.get(self.URL_METRICS).content.decode()
+        assert get_sample(text, 'yamdb_signups_total') == 6, (
+            'Проверьте, что метрики разных процессов суммируются.'
+        )
+
+    def test_03_store_grows(self, metrics_dir):
+        counter = metrics.Counter('yamdb_test_grow', 'Тест.', ('index',))
+        try:
+            for index in range(3000):
+                counter.inc(index=index)
+            values = metrics.collect_values()
+            assert len(values) == 3000
+            assert all(value == 1 for value in values.values())
+        finally:
+            metrics.registry.remove(counter)
+
+    def test_04_dead_process_gauges(self, metrics_dir):
+        gauge = metrics.Gauge('yamdb_test_live', 'Тест.')
+        try:
+            gauge.inc()
+            process = multiprocessing.get_context('fork').Process(
+                target=increment_gauge, args=(gauge,))
+            process.start()
+            process.join()
+            assert (metrics_dir / f'live_{process.pid}.db').exists()
+            assert metrics.collect_values() == {
+                gauge.key(gauge.name, {}): 1}, (
+                'Проверьте, что показатели завершившихся процессов не '
+                'входят в сумму.'
+            )
+            metrics.mark_process_dead(process.pid)
+            assert not (metrics_dir / f'live_{process.pid}.db').exists()
+        finally:
+            metrics.registry.remove(gauge)
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22CachedAuthentication:
+
+    URL_TITLES = '/api/v1/titles/'
+    URL_USERS = '/api/v1/users/'
+    URL_ME = '/api/v1/users/me/'
+
+    def test_01_user_query_skipped(self, user_client):
+        user_client.get(self.URL_TITLES)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(self.URL_TITLES)
+        assert response.status_code == HTTPStatus.OK
+        user_queries = [query['sql'] for query in context.captured_queries
+                        if 'reviews_customuser' in query['sql']]
+        assert not user_queries, (
+            'Проверьте, что повторный запрос с тем же токеном не загружает '
+            'пользователя из БД.'
+        )
+
+        response = user_client.get(self.URL_ME)
+        assert response.json()['email'] == 'testuser@yamdb.fake', (
+            f'Проверьте, что `{self.URL_ME}` возвращает полный профиль '
+            'пользователя.'
+        )
+
+    def test_02_role_change_invalidates(self, admin_client, user_client,
+                                        user):
+        assert user_client.get(self.URL_USERS).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        response = admin_client.patch(
+            f'{self.URL_USERS}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.URL_USERS).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение роли пользователя сбрасывает его '
+            'снимок в кеше аутентификации.'
+        )
+
+    def test_03_deactivation_invalidates(self, user_client, user):
+        user_client.get(self.URL_TITLES)
+        user.is_active = False
+        user.save()
+        response = user_client.get(self.URL_TITLES)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что деактивированный пользователь не проходит '
+            'аутентификацию по закешированному снимку.'
+        )
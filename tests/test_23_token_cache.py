@@ -0,0 +1,90 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.authentication import revoke_token
+from api.caches import VerifiedTokenCache, verified_token_cache
+
+
+@pytest.fixture
+def token_checks(monkeypatch):
+    calls = []
+    original = JWTAuthentication.get_validated_token
+
+    def get_validated_token(self, raw_token):
+        calls.append(raw_token)
+        return original(self, raw_token)
+
+    monkeypatch.setattr(
+        JWTAuthentication, 'get_validated_token', get_validated_token
+    )
+    return calls
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23TokenCache:
+
+    URL_TITLES = '/api/v1/titles/'
+
+    def test_01_signature_checked_once(self, user_client, token_checks):
+        for _ in range(3):
+            response = user_client.get(self.URL_TITLES)
+            assert response.status_code == HTTPStatus.OK
+        assert len(token_checks) == 1, (
+            'Проверьте, что подпись повторно присланного токена не '
+            'проверяется заново.'
+        )
+
+    def test_02_revoked_token(self, user_client, token_user):
+        user_client.get(self.URL_TITLES)
+        revoke_token(token_user['access'])
+        response = user_client.get(self.URL_TITLES)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что отозванный токен не принимается.'
+        )
+
+    def test_03_deactivated_user(self, user_client, user):
+        user_client.get(self.URL_TITLES)
+        assert len(verified_token_cache) == 1
+        user.is_active = False
+        user.save()
+        assert len(verified_token_cache) == 0, (
+            'Проверьте, что деактивация пользователя убирает его токены из '
+            'кеша.'
+        )
+        response = user_client.get(self.URL_TITLES)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_04_expiry_and_size(self):
+        token_cache = VerifiedTokenCache(max_entries=2)
+        token_cache.set(b'expired', {'exp': time.time() - 1}, 1)
+        assert token_cache.get(b'expired') is None, (
+            'Проверьте, что истёкший токен не отдаётся из кеша.'
+        )
+        for name in (b'first', b'second', b'third'):
+            token_cache.set(name, {'exp': time.time() + 60}, 1)
+        assert len(token_cache) == 2
+        assert token_cache.get(b'first') is None
+        assert token_cache.get(b'third') is not None
+
+    def test_05_revoked_on_change_only(self, monkeypatch, user):
+        revoked = []
+        monkeypatch.setattr('api.signals.revoke_user_tokens', revoked.append)
+        user.bio = 'Новая биография'
+        user.save()
+        user.is_active = False
+        user.save()
+        user.bio = 'Ещё одна биография'
+        user.save()
+        assert revoked == [user.pk], (
+            'Проверьте, что токены отзываются только при деактивации, а '
+            'не при каждом сохранении неактивного пользователя.'
+        )
+        user.role = user.MODERATOR
+        user.save()
+        user.delete()
+        assert len(revoked) == 3, (
+            'Проверьте, что токены отзываются при смене роли и удалении.'
+        )
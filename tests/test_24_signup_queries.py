@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import SignUpSerializer
+from reviews.models import CustomUser, OutgoingEmail
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24SignupQueries:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    DATA = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+
+    def test_01_new_and_repeat_signup(self, client):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_SIGNUP, data=self.DATA)
+        assert response.status_code == HTTPStatus.OK
+        assert len(context.captured_queries) <= 4, (
+            'Проверьте, что регистрация нового пользователя проверяет '
+            'имя и почту одним запросом и пишет в одной транзакции.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_SIGNUP, data=self.DATA)
+        assert response.status_code == HTTPStatus.OK
+        assert len(context.captured_queries) <= 2, (
+            'Проверьте, что повторная регистрация не выполняет лишних '
+            'запросов к пользователям.'
+        )
+        assert CustomUser.objects.filter(username='new_user').count() == 1
+        assert OutgoingEmail.objects.count() == 2
+
+    @pytest.mark.parametrize('data, message', (
+        ({'username': 'new_user', 'email': 'other@yamdb.fake'},
+         'Такая почта уже существует'),
+        ({'username': 'other_user', 'email': 'new_user@yamdb.fake'},
+         'Такое имя пользователя уже существует'),
+    ))
+    def test_02_conflicts(self, client, data, message):
+        CustomUser.objects.create(**self.DATA)
+        response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert message in response.json()['non_field_errors'], (
+            'Проверьте, что при конфликте имени или почты возвращается '
+            'прежнее сообщение об ошибке.'
+        )
+
+    def test_03_concurrent_signup(self, client, monkeypatch):
+        CustomUser.objects.create(**self.DATA)
+        validate = SignUpSerializer.validate
+        calls = []
+
+        def stale_validate(serializer, data):
+            # Первая проверка не видит пользователя, созданного
+            # параллельным запросом.
+            data = validate(serializer, data)
+            if not calls:
+                serializer.user = None
+            calls.append(data)
+            return data
+
+        monkeypatch.setattr(SignUpSerializer, 'validate', stale_validate)
+        response = client.post(self.URL_SIGNUP, data=self.DATA)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что гонка регистраций с одинаковыми данными '
+            'не приводит к ошибке сервера.'
+        )
+        assert len(calls) == 2
+        assert CustomUser.objects.filter(username='new_user').count() == 1
+        assert OutgoingEmail.objects.count() == 1
@@ -0,0 +1,90 @@
+import time
+from http import HTTPStatus
+
+import pytest
+
+from api.throttling import (LocalCounterStore, SlidingWindowThrottle,
+                            get_counter_store)
+
+
+@pytest.fixture
+def throttle_rates(settings, monkeypatch):
+    settings.THROTTLE_COUNTER_STORE = 'api.throttling.LocalCounterStore'
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            'signup': '5/min', 'signup-identity': '2/min',
+            'token': '5/min', 'token-identity': '2/min',
+        },
+    }
+    now = [600.0]
+    monkeypatch.setattr(SlidingWindowThrottle, 'timer',
+                        staticmethod(lambda: now[0]))
+    get_counter_store().clear()
+    yield now
+    get_counter_store().clear()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Throttling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    def signup(self, client, number):
+        return client.post(self.URL_SIGNUP, data={
+            'username': f'user_{number}',
+            'email': f'user_{number}@yamdb.fake'})
+
+    def test_01_identity_limit(self, client, throttle_rates):
+        data = {'username': 'same_user', 'email': 'same_user@yamdb.fake'}
+        for _ in range(2):
+            response = client.post(self.URL_SIGNUP, data=data)
+            assert response.status_code == HTTPStatus.OK
+        response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что частые запросы кода для одного имени '
+            'пользователя ограничиваются.'
+        )
+        assert int(response['Retry-After']) >= 1
+        response = self.signup(client, 0)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что ограничение по имени не затрагивает других '
+            'пользователей.'
+        )
+
+    def test_02_ip_limit(self, client, throttle_rates):
+        for number in range(5):
+            assert self.signup(client, number).status_code == HTTPStatus.OK
+        assert self.signup(client, 5).status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS
+        ), 'Проверьте, что частые запросы с одного IP ограничиваются.'
+        response = client.post(
+            self.URL_TOKEN, data={'username': 'user_0'},
+            REMOTE_ADDR='10.0.0.2')
+        assert response.status_code != HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что счётчики разных эндпоинтов и IP независимы.'
+        )
+
+    def test_03_sliding_window(self, client, throttle_rates):
+        for number in range(5):
+            self.signup(client, number)
+        # Половина следующего окна: предыдущее учитывается с весом 0.5.
+        throttle_rates[0] += 90
+        for number in range(5, 8):
+            assert self.signup(client, number).status_code == HTTPStatus.OK
+        assert self.signup(client, 8).status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS
+        ), 'Проверьте, что запросы предыдущего окна учитываются с весом.'
+        throttle_rates[0] += 60
+        assert self.signup(client, 9).status_code == HTTPStatus.OK
+
+
+def test_local_counter_store_expires(monkeypatch):
+    store = LocalCounterStore()
+    store.incr('key', 10)
+    store.incr('key', 10)
+    assert store.get_many(['key', 'other']) == {'key': 2}
+    monotonic = time.monotonic() + 11
+    monkeypatch.setattr('api.throttling.time.monotonic', lambda: monotonic)
+    assert store.get_many(['key']) == {}
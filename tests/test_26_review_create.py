@@ -0,0 +1,52 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ReviewCreate:
+
+    DATA = {'text': 'Отзыв', 'score': 7}
+
+    def get_url(self, title_id):
+        return f'/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_create_queries(self, user_client, title):
+        user_client.get(self.get_url(title.pk))
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(self.get_url(title.pk),
+                                        data=self.DATA)
+        assert response.status_code == HTTPStatus.CREATED
+        statements = [query['sql'] for query in context.captured_queries
+                      if query['sql'] != 'BEGIN']
+        assert len(statements) <= 3, (
+            'Проверьте, что создание отзыва выполняет не больше трёх '
+            f'запросов, выполнено: {statements}.'
+        )
+        title.refresh_from_db()
+        assert (title.reviews_count, title.rating) == (1, 7), (
+            'Проверьте, что создание отзыва обновляет рейтинг произведения.'
+        )
+
+    def test_02_duplicate_review(self, user_client, title):
+        user_client.post(self.get_url(title.pk), data=self.DATA)
+        response = user_client.post(self.get_url(title.pk), data=self.DATA)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json()['non_field_errors'] == [
+            'Вы уже оставили отзыв на данное произведение. '
+            'Можете его отредактировать.'
+        ], 'Проверьте сообщение об ошибке повторного отзыва.'
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum) == (1, 7), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг.'
+        )
+
+    def test_03_missing_title(self, user_client, title):
+        response = user_client.post(self.get_url(title.pk + 1),
+                                    data=self.DATA)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert not Review.objects.exists()
@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+
+
+@pytest.fixture
+def review(user, make_titles):
+    titles = make_titles(2)
+    review = Review.objects.create(
+        title=titles[0], author=user, text='Отзыв', score=5)
+    Comment.objects.create(review=review, author=user, text='Комментарий')
+    return review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27CommentQueries:
+
+    def get_url(self, title_id, review_id):
+        return f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+
+    def test_01_title_review_pairing(self, user_client, review):
+        url = self.get_url(review.title_id + 1, review.pk)
+        assert user_client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии отзыва недоступны по адресу '
+            'другого произведения.'
+        )
+        response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert Comment.objects.count() == 1
+
+    def test_02_warm_reads_skip_review_lookup(self, user_client, review):
+        url = self.get_url(review.title_id, review.pk)
+        comment = Comment.objects.get()
+        user_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(f'{url}{comment.pk}/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['author'] == review.author.username
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что повторное чтение комментария выполняет один '
+            'запрос с автором и без проверки отзыва.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not [query for query in context.captured_queries
+                    if 'FROM "reviews_review"' in query['sql']], (
+            'Проверьте, что наличие отзыва берётся из кеша.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 1
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что повторное чтение списка комментариев выполняет '
+            'один запрос без COUNT.'
+        )
+        Comment.objects.create(
+            review=review, author=review.author, text='Ещё комментарий')
+        assert user_client.get(url).json()['count'] == 2, (
+            'Проверьте, что новый комментарий сбрасывает кешированное '
+            'количество.'
+        )
+
+    def test_03_deleted_review(self, user_client, review):
+        url = self.get_url(review.title_id, review.pk)
+        user_client.get(url)
+        review.delete()
+        assert user_client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что удаление отзыва сбрасывает кеш его наличия.'
+        )
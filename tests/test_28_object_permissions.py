@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.permissions import IsAuthorOrAdminPermission
+from reviews.models import Review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28ObjectPermissions:
+
+    def test_01_author_id_without_queries(self, user, moderator, admin):
+        permission = IsAuthorOrAdminPermission()
+        other = Review(author_id=user.pk + 1000)
+        own = Review(author_id=user.pk)
+        with CaptureQueriesContext(connection) as context:
+            request = SimpleNamespace(method='PATCH', user=user)
+            assert permission.has_object_permission(request, None, own)
+            assert not permission.has_object_permission(
+                request, None, other)
+            for staff in (moderator, admin):
+                request = SimpleNamespace(method='DELETE', user=staff)
+                assert permission.has_object_permission(
+                    request, None, other)
+        assert not context.captured_queries, (
+            'Проверьте, что проверка прав на объект сравнивает `author_id` '
+            'и не загружает автора.'
+        )
+
+    def test_02_role_decision_once_per_request(self, user):
+        permission = IsAuthorOrAdminPermission()
+        request = SimpleNamespace(method='PATCH', user=user)
+        other = Review(author_id=user.pk + 1000)
+        assert not permission.has_object_permission(request, None, other)
+        user.role = 'admin'
+        assert not permission.has_object_permission(request, None, other), (
+            'Проверьте, что решение по роли вычисляется один раз за запрос.'
+        )
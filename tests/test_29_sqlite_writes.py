@@ -0,0 +1,225 @@
+import contextlib
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import (IntegrityError, OperationalError, connections,
+                       transaction)
+from django.db.utils import ConnectionHandler
+
+from core.writes import WriteCoalescer
+from reviews.models import Category, Comment, CustomUser, Review, Title
+
+THREADS = 8
+WRITES = 25
+
+
+def open_connection(path):
+    profile = settings.SQLITE_PROFILES['production']
+    handler = ConnectionHandler({'default': {
+        'ENGINE': 'core.backends.sqlite3', 'NAME': str(path), **profile}})
+    return handler['default']
+
+
+def increment(connection):
+    # Чтение перед записью: с BEGIN DEFERRED такая транзакция получает
+    # `database is locked` при повышении блокировки.
+    with connection.cursor() as cursor:
+        connection._start_transaction_under_autocommit()
+        cursor.execute('SELECT value FROM counter')
+        value = cursor.fetchone()[0]
+        cursor.execute('UPDATE counter SET value = %s', [value + 1])
+        cursor.execute('COMMIT')
+
+
+@contextlib.contextmanager
+def profile_database(path, profile):
+    """Соединения `default` новых потоков к файлу с профилем SQLite."""
+    saved = connections.settings['default']
+    connections.settings['default'] = {
+        **saved, 'NAME': str(path), **settings.SQLITE_PROFILES[profile]}
+    try:
+        yield
+    finally:
+        connections.settings['default'] = saved
+
+
+def run_threads(target, count):
+    def run():
+        try:
+            target()
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def review_stress(path, profile):
+    """Отзывы с комментариями из параллельных потоков.
+
+    Каждая запись проверяет наличие отзыва и создаёт его в одной
+    транзакции, как сериализатор. Возвращает (записей, ошибок блокировки,
+    секунд).
+    """
+    with profile_database(path, profile):
+        run_threads(lambda: call_command('migrate', verbosity=0), 1)
+        authors, titles = [], []
+
+        def prepare():
+            category = Category.objects.create(name='Фильм', slug='films')
+            titles.extend(Title.objects.create(
+                name=f'Произведение {idx}', year=2000, category=category)
+                for idx in range(WRITES))
+            authors.extend(CustomUser.objects.create(
+                username=f'writer{idx}', email=f'writer{idx}@yamdb.fake')
+                for idx in range(THREADS))
+
+        run_threads(prepare, 1)
+        pending = list(reversed(authors))
+        written, locked = [], []
+
+        def work():
+            author = pending.pop()
+            for title in titles:
+                try:
+                    with transaction.atomic():
+                        if Review.objects.filter(
+                                title=title, author=author).exists():
+                            continue
+                        review = Review.objects.create(
+                            title=title, author=author, text='Отзыв',
+                            score=5)
+                        Comment.objects.create(
+                            review=review, author=author, text='Да')
+                    written.append(review.pk)
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    locked.append(error)
+
+        started = time.perf_counter()
+        run_threads(work, THREADS)
+        return len(written), len(locked), time.perf_counter() - started
+
+
+@pytest.fixture
+def db_access(django_db_blocker):
+    # Соединения к отдельному файлу, а не к тестовой БД.
+    with django_db_blocker.unblock():
+        yield
+
+
+@pytest.mark.usefixtures('db_access')
+class Test29SqliteWrites:
+
+    def test_01_production_pragmas(self, tmp_path):
+        connection = open_connection(tmp_path / 'db.sqlite3')
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'busy_timeout', 'synchronous'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+        connection.close()
+        assert pragmas == {
+            'journal_mode': 'wal', 'busy_timeout': 5000, 'synchronous': 1
+        }, 'Проверьте PRAGMA production-профиля SQLite.'
+
+    def test_02_concurrent_writes_without_lock_errors(self, tmp_path):
+        path = tmp_path / 'db.sqlite3'
+        connection = open_connection(path)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (value integer)')
+            cursor.execute('INSERT INTO counter VALUES (0)')
+        connection.close()
+        errors = []
+
+        def work():
+            connection = open_connection(path)
+            try:
+                for _ in range(WRITES):
+                    increment(connection)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, (
+            'Проверьте, что параллельные записи в production-профиле не '
+            f'получают ошибок блокировки: {errors[:3]}.'
+        )
+        connection = open_connection(path)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT value FROM counter')
+            assert cursor.fetchone()[0] == THREADS * WRITES
+        connection.close()
+
+    def test_03_review_writes_by_profile(self, tmp_path):
+        dev = review_stress(tmp_path / 'dev.sqlite3', 'dev')
+        production = review_stress(
+            tmp_path / 'production.sqlite3', 'production')
+        assert dev[1], (
+            'Ожидалось, что профиль dev получает `database is locked` при '
+            'параллельной записи отзывов.'
+        )
+        assert production[:2] == (THREADS * WRITES, 0), (
+            'Проверьте, что в production-профиле все отзывы записываются '
+            f'без ошибок блокировки: {production}.'
+        )
+        assert production[0] / production[2] > dev[0] / dev[2], (
+            'Проверьте, что production-профиль записывает больше отзывов '
+            f'в секунду: dev {dev}, production {production}.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29WriteCoalescer:
+
+    def test_01_batches_and_isolates_errors(self):
+        coalescer = WriteCoalescer(max_batch=50, max_delay=0.05)
+        futures = [
+            coalescer.submit(lambda idx=idx: Category.objects.create(
+                name=f'Категория {idx}', slug=f'category-{idx % 10}'))
+            for idx in range(20)
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=10))
+            except IntegrityError:
+                results.append(None)
+        assert sum(result is not None for result in results) == 10, (
+            'Проверьте, что ошибка одной записи не отменяет остальные '
+            'записи пачки.'
+        )
+        assert Category.objects.count() == 10
+        assert coalescer.batches < len(futures), (
+            'Проверьте, что очередь объединяет записи в пачки.'
+        )
+
+    def test_02_review_create_through_queue(self, settings, user_client,
+                                            title):
+        settings.WRITE_COALESCER_ENABLED = True
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = {'text': 'Отзыв', 'score': 6}
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.CREATED
+        )
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.BAD_REQUEST
+        ), 'Проверьте, что ошибки записи из очереди доходят до ответа.'
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk + 1}/reviews/', data=data)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert Review.objects.count() == 1
@@ -0,0 +1,103 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.functional import SimpleLazyObject
+
+from core.middleware import ReplicaRoutingMiddleware
+from core.routers import (PRIMARY, REPLICA, PrimaryReplicaRouter,
+                          current_read, read_from)
+from reviews.models import Title
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setitem(connections.databases, REPLICA,
+                        connections.databases[PRIMARY])
+
+
+def make_middleware(view):
+    def get_response(request):
+        return view(request, router.db_for_read(Title))
+    router = PrimaryReplicaRouter()
+    return ReplicaRoutingMiddleware(get_response)
+
+
+def authenticate(request, user):
+    # Так DRF сохраняет пользователя после аутентификации по JWT.
+    request.user = user
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30ReplicaRouter:
+
+    def test_01_defaults_to_primary(self, replica):
+        router = PrimaryReplicaRouter()
+        assert router.db_for_read(Title) == PRIMARY, (
+            'Проверьте, что вне запроса чтение идёт из основной БД.'
+        )
+        with read_from(REPLICA):
+            assert router.db_for_read(Title) == REPLICA
+            with transaction.atomic():
+                assert router.db_for_read(Title) == PRIMARY, (
+                    'Проверьте, что внутри транзакции чтение идёт из '
+                    'основной БД.'
+                )
+        assert router.db_for_write(Title) == PRIMARY
+        assert router.allow_migrate(REPLICA, 'reviews') is False
+
+    def test_02_falls_back_without_replica(self):
+        with read_from(REPLICA):
+            assert PrimaryReplicaRouter().db_for_read(Title) == PRIMARY
+
+    def test_03_safe_api_requests_read_replica(self, replica):
+        seen = []
+
+        def view(request, alias):
+            seen.append(alias)
+            return HttpResponse()
+
+        middleware = make_middleware(view)
+        factory = RequestFactory()
+        middleware(factory.get('/api/v1/titles/'))
+        middleware(factory.post('/api/v1/titles/'))
+        middleware(factory.get('/admin/'))
+        assert seen == [REPLICA, PRIMARY, PRIMARY], (
+            'Проверьте, что с реплики читают только безопасные запросы '
+            'к API.'
+        )
+        assert current_read.get() is None
+
+    def test_04_sticky_primary_after_write(self, replica, user):
+        seen = []
+
+        def view(request, alias):
+            authenticate(request, user)
+            seen.append(PrimaryReplicaRouter().db_for_read(Title))
+            return HttpResponse(status=201 if request.method == 'POST'
+                                else 200)
+
+        middleware = make_middleware(view)
+        factory = RequestFactory()
+        middleware(factory.get('/api/v1/titles/'))
+        middleware(factory.post('/api/v1/titles/1/reviews/'))
+        middleware(factory.get('/api/v1/titles/1/reviews/'))
+        assert seen == [REPLICA, PRIMARY, PRIMARY], (
+            'Проверьте, что после записи пользователь читает из основной '
+            'БД.'
+        )
+
+    def test_05_unresolved_user_not_evaluated(self, replica):
+        request = RequestFactory().get('/api/v1/titles/')
+
+        def load_user():
+            raise AssertionError('Ленивый пользователь не должен '
+                                 'загружаться при выборе соединения.')
+
+        request.user = SimpleLazyObject(load_user)
+        middleware = make_middleware(
+            lambda request, alias: HttpResponse(alias))
+        assert middleware(request).content.decode() == REPLICA
+        authenticate(request, AnonymousUser())
+        assert middleware(request).content.decode() == REPLICA
@@ -0,0 +1,145 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+from reviews.search import SearchResults
+
+URL_REVIEWS = '/api/v1/bulk/reviews/'
+URL_COMMENTS = '/api/v1/bulk/comments/'
+
+
+def to_ndjson(rows):
+    return '\n'.join(
+        row if isinstance(row, str) else json.dumps(row, ensure_ascii=False)
+        for row in rows)
+
+
+def post(client, url, rows):
+    return client.post(url, data=to_ndjson(rows),
+                       content_type='application/x-ndjson')
+
+
+@pytest.fixture
+def titles(make_titles):
+    return make_titles(3)
+
+
+@pytest.fixture
+def authors(django_user_model):
+    return [
+        django_user_model.objects.create(
+            username=f'partner{idx}', email=f'partner{idx}@yamdb.fake')
+        for idx in range(20)
+    ]
+
+
+def review_rows(titles, authors, count):
+    return [{'title_id': titles[idx % len(titles)].pk,
+             'author': authors[idx].username,
+             'text': f'Пакетный отзыв {idx}', 'score': idx % 10 + 1}
+            for idx in range(count)]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31BulkIngest:
+
+    def test_01_admin_only(self, user_client, titles, authors):
+        response = post(user_client, URL_REVIEWS,
+                        review_rows(titles, authors, 1))
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        assert not Review.objects.exists()
+
+    def test_02_reviews_per_row_results(self, admin_client, titles,
+                                        authors):
+        Review.objects.create(title=titles[0], author=authors[5],
+                              text='Отзыв', score=5)
+        rows = review_rows(titles, authors, 3) + [
+            {'title_id': titles[0].pk, 'author': authors[5].username,
+             'text': 'Повтор в БД', 'score': 5},
+            {'title_id': titles[0].pk, 'author': authors[0].username,
+             'text': 'Повтор в пачке', 'score': 5},
+            {'title_id': titles[1].pk, 'author': authors[6].username,
+             'text': 'Оценка', 'score': 11},
+            {'title_id': 0, 'author': authors[7].username,
+             'text': 'Нет произведения', 'score': 3},
+            {'title_id': titles[1].pk, 'author': 'nobody',
+             'text': 'Нет автора', 'score': 3},
+            'не json',
+        ]
+        response = post(admin_client, URL_REVIEWS, rows)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert (data['created'], data['errors']) == (3, 6)
+        statuses = [result['status'] for result in data['results']]
+        assert statuses == ['created'] * 3 + ['error'] * 6, (
+            'Проверьте, что результаты возвращаются для каждой строки в '
+            'порядке тела запроса.'
+        )
+        assert [result['line'] for result in data['results']] == list(
+            range(1, 10))
+        errors = [result.get('errors') for result in data['results']]
+        assert 'non_field_errors' in errors[3]
+        assert 'non_field_errors' in errors[4]
+        assert 'score' in errors[5]
+        assert 'title_id' in errors[6]
+        assert 'author' in errors[7]
+        created_ids = {result['id'] for result in data['results'][:3]}
+        assert created_ids == set(Review.objects.filter(
+            text__startswith='Пакетный').values_list('pk', flat=True))
+
+    def test_03_ratings_and_search(self, admin_client, titles, authors):
+        post(admin_client, URL_REVIEWS, review_rows(titles, authors, 6))
+        for title in titles:
+            title.refresh_from_db()
+            scores = list(title.reviews.values_list('score', flat=True))
+            assert title.reviews_count == len(scores)
+            assert title.rating == sum(scores) // len(scores), (
+                'Проверьте, что рейтинг произведений пересчитывается после '
+                'пакетной загрузки.'
+            )
+        if connection.vendor == 'sqlite':
+            assert any(result['kind'] == 'review'
+                       for result in SearchResults('пакетный')[0:10])
+
+    def test_04_queries_do_not_depend_on_rows(self, admin_client, titles,
+                                              authors):
+        post(admin_client, URL_REVIEWS, [])
+        counts = []
+        for start, count in ((0, 2), (2, 18)):
+            rows = review_rows(titles, authors, start + count)[start:]
+            with CaptureQueriesContext(connection) as context:
+                response = post(admin_client, URL_REVIEWS, rows)
+            assert response.json()['created'] == count
+            counts.append(len(context))
+        assert counts[0] == counts[1], (
+            'Проверьте, что число запросов пакетной загрузки не зависит '
+            f'от числа строк: {counts}.'
+        )
+
+    def test_05_comments(self, admin_client, titles, authors):
+        review = Review.objects.create(title=titles[0], author=authors[0],
+                                       text='Отзыв', score=5)
+        rows = [
+            {'review_id': review.pk, 'author': authors[1].username,
+             'text': 'Комментарий'},
+            {'review_id': review.pk + 1, 'author': authors[1].username,
+             'text': 'Нет отзыва'},
+            {'review_id': review.pk, 'author': authors[2].username},
+        ]
+        data = post(admin_client, URL_COMMENTS, rows).json()
+        assert [result['status'] for result in data['results']] == [
+            'created', 'error', 'error']
+        assert 'review_id' in data['results'][1]['errors']
+        assert 'text' in data['results'][2]['errors']
+        assert Comment.objects.get().text == 'Комментарий'
+
+    def test_06_empty_and_oversized(self, admin_client, settings):
+        response = post(admin_client, URL_REVIEWS, [])
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        settings.BULK_INGEST_MAX_ROWS = 1
+        response = post(admin_client, URL_REVIEWS, [{}, {}])
+        assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
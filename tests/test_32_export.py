@@ -0,0 +1,168 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tracemalloc
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reviews.models import Category, Comment, Review, Title
+
+URL_REVIEWS = '/api/v1/export/reviews/'
+URL_COMMENTS = '/api/v1/export/comments/'
+
+
+@pytest.fixture
+def catalog(django_user_model, category, make_titles):
+    categories = [category, Category.objects.create(
+        name='Сериал', slug='series')]
+    titles = make_titles(4)
+    for title in titles[1::2]:
+        title.category = categories[1]
+        title.save()
+    authors = [django_user_model.objects.create(
+        username=f'reader{idx}', email=f'reader{idx}@yamdb.fake')
+        for idx in range(5)]
+    reviews = Review.objects.bulk_create(
+        Review(title=title, author=author, text=f'Отзыв "{idx}", с запятой',
+               score=idx % 10 + 1)
+        for idx, (title, author) in enumerate(
+            (title, author) for title in titles for author in authors))
+    reviews = list(Review.objects.order_by('pk'))
+    Review.objects.filter(pk=reviews[0].pk).update(
+        pub_date=timezone.now() - timedelta(days=30))
+    Comment.objects.bulk_create(
+        Comment(review=review, author=authors[0], text='Комментарий')
+        for review in reviews[:6])
+    return {'titles': titles, 'categories': categories, 'reviews': reviews}
+
+
+def read(response):
+    assert response.status_code == HTTPStatus.OK
+    return b''.join(response.streaming_content)
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in read(response).decode().splitlines()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test32Export:
+
+    def test_01_admin_only(self, user_client, catalog):
+        assert user_client.get(URL_REVIEWS).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+
+    def test_02_ndjson_single_query(self, admin_client, catalog):
+        admin_client.get(URL_COMMENTS)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(URL_REVIEWS)
+            assert response.streaming, (
+                'Проверьте, что выгрузка отдаётся StreamingHttpResponse.'
+            )
+            rows = read_ndjson(response)
+        assert len(context) == 1, (
+            'Проверьте, что выгрузка читает строки одним запросом.'
+        )
+        assert len(rows) == 20
+        assert [row['id'] for row in rows] == [
+            review.pk for review in catalog['reviews']]
+        assert set(rows[0]) == {
+            'id', 'title_id', 'author', 'text', 'score', 'pub_date'}
+        assert rows[0]['author'] == 'reader0'
+        assert response['Content-Disposition'] == (
+            'attachment; filename="reviews.ndjson"'
+        )
+
+    def test_03_csv_and_gzip(self, admin_client, catalog):
+        plain = read(admin_client.get(URL_REVIEWS, {'output': 'csv'}))
+        rows = list(csv.reader(io.StringIO(plain.decode())))
+        assert rows[0] == [
+            'id', 'title_id', 'author', 'text', 'score', 'pub_date']
+        assert len(rows) == 21
+        assert rows[1][3] == 'Отзыв "0", с запятой'
+        response = admin_client.get(
+            URL_REVIEWS, {'output': 'csv', 'gzip': '1'})
+        assert response['Content-Type'] == 'application/gzip'
+        assert gzip.decompress(read(response)) == plain, (
+            'Проверьте, что сжатая выгрузка совпадает с обычной.'
+        )
+
+    def test_04_filters(self, admin_client, catalog):
+        title = catalog['titles'][1]
+        rows = read_ndjson(admin_client.get(URL_REVIEWS, {'title': title.pk}))
+        assert {row['title_id'] for row in rows} == {title.pk}
+        rows = read_ndjson(admin_client.get(
+            URL_REVIEWS, {'category': catalog['categories'][0].slug}))
+        assert {row['title_id'] for row in rows} == {
+            catalog['titles'][0].pk, catalog['titles'][2].pk}
+        today = timezone.localdate().isoformat()
+        rows = read_ndjson(admin_client.get(URL_REVIEWS, {
+            'date_from': today, 'date_to': today}))
+        assert len(rows) == 19, (
+            'Проверьте фильтр выгрузки по датам публикации.'
+        )
+        rows = read_ndjson(admin_client.get(
+            URL_COMMENTS, {'title': catalog['titles'][0].pk}))
+        assert len(rows) == 5
+        assert {row['title_id'] for row in rows} == {
+            catalog['titles'][0].pk}
+
+    def test_05_invalid_params(self, admin_client, catalog):
+        assert admin_client.get(
+            URL_REVIEWS, {'date_from': 'вчера'}).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+        assert admin_client.get(
+            URL_REVIEWS, {'output': 'xml'}).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+
+    def test_06_command_matches_endpoint(self, admin_client, catalog,
+                                         tmp_path):
+        path = tmp_path / 'reviews.csv.gz'
+        call_command('export_data', 'reviews', '--output', 'csv', '--gzip',
+                     '--file', str(path), '--title',
+                     str(catalog['titles'][0].pk), stdout=io.StringIO())
+        response = admin_client.get(
+            URL_REVIEWS, {'output': 'csv', 'title': catalog['titles'][0].pk})
+        assert gzip.decompress(path.read_bytes()) == read(response)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_memory_does_not_grow(django_user_model, tmp_path,
+                                     category):
+    titles = Title.objects.bulk_create(
+        Title(name=f'Произведение {idx}', year=2000, description='',
+              category=category) for idx in range(50))
+    titles = list(Title.objects.all())
+    authors = list(django_user_model.objects.bulk_create(
+        django_user_model(username=f'reader{idx}',
+                          email=f'reader{idx}@yamdb.fake')
+        for idx in range(60)))
+    authors = list(django_user_model.objects.all())
+    Review.objects.bulk_create(
+        (Review(title=title, author=author, text='Отзыв ' * 40, score=5)
+         for title in titles for author in authors), batch_size=500)
+    path = tmp_path / 'reviews.ndjson'
+    tracemalloc.start()
+    try:
+        call_command('export_data', 'reviews', '--file', str(path),
+                     '--chunk-size', '100', stdout=io.StringIO())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    size = os.path.getsize(path)
+    assert size > 600_000
+    assert peak < size / 3, (
+        'Проверьте, что выгрузка не держит все строки в памяти: пик '
+        f'{peak} байт при размере файла {size} байт.'
+    )